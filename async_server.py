@@ -1,72 +1,236 @@
+import os
+import time
 import asyncio
-import json
+import logging
 from .command_handler import CommandHandler
-from .services import AuthService
+from .data.storage import get_storage
+from .utils.log import get_logger, sampler
+from .utils.metrics import metrics
+from .utils.profiler import profiler
+from .utils.rate_limit import RateLimiter
+from .protocol import (
+    MAX_FRAME_SIZE,
+    FrameError,
+    MessageError,
+    LegacyFraming,
+    create_codec,
+    negotiate
+)
+
+# 分帧协议下单个连接同时处理的请求数上限
+MAX_IN_FLIGHT = 32
+# 清理过期登录会话的间隔（秒）
+SESSION_CLEANUP_INTERVAL = 60
+
+logger = get_logger("server")
+
+class ClientConnection:
+    # 单个客户端连接的状态：当前分帧方式与消息编码、写锁以及正在处理的请求
+    def __init__(self, reader, writer, framing, codec, max_in_flight):
+        self.reader = reader
+        self.writer = writer
+        self.address = writer.get_extra_info('peername')
+        # 日志中使用的客户端地址
+        self.client = f"{self.address[0]}:{self.address[1]}" if self.address else "unknown"
+        self.framing = framing
+        self.codec = codec
+        # 并发处理的请求共用一个 writer，整帧写入需要串行
+        self.write_lock = asyncio.Lock()
+        self.in_flight = asyncio.Semaphore(max_in_flight)
+        self.tasks = set()
+        # 订阅 id -> (订阅, 推送任务)
+        self.subscriptions = {}
+    
+    def start(self, coro):
+        # 调用方已获取 in_flight，任务结束时释放
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self._finished)
+        return task
+    
+    def _finished(self, task):
+        self.tasks.discard(task)
+        self.in_flight.release()
+    
+    async def wait_in_flight(self):
+        if self.tasks:
+            await asyncio.gather(*list(self.tasks), return_exceptions=True)
+    
+    def cancel_in_flight(self):
+        # 连接断开后结果无法送达，取消仍在处理的请求以释放资源
+        current = asyncio.current_task()
+        for task in list(self.tasks):
+            if task is not current:
+                task.cancel()
+    
+    @property
+    def supports_push(self):
+        # 只有带消息边界的分帧协议才能在响应之间插入推送消息
+        return self.framing.pipelined
+    
+    def add_subscription(self, subscription):
+        task = asyncio.create_task(self._push_events(subscription))
+        self.subscriptions[subscription.id] = (subscription, task)
+    
+    def remove_subscription(self, subscription_id):
+        entry = self.subscriptions.pop(subscription_id, None)
+        if entry is None:
+            return False
+        subscription, task = entry
+        subscription.close()
+        task.cancel()
+        return True
+    
+    def close_subscriptions(self):
+        for subscription_id in list(self.subscriptions):
+            self.remove_subscription(subscription_id)
+    
+    async def _push_events(self, subscription):
+        try:
+            while True:
+                event = await subscription.get()
+                if event is None:
+                    break
+                await self.send({
+                    "status": "success",
+                    "data": event,
+                    "command": "EVENT",
+                    "subscription_id": subscription.id
+                })
+            # 被总线断开（慢消费者）时通知客户端
+            if self.subscriptions.pop(subscription.id, None) is not None:
+                await self.send({
+                    "status": "error",
+                    "message": f"Subscription closed: {subscription.close_reason}",
+                    "command": "EVENT",
+                    "subscription_id": subscription.id
+                })
+        except ConnectionError:
+            subscription.close("connection lost")
+    
+    async def send(self, message):
+        # 返回写出的字节数
+        payload = await self.framing.encode_frame(self.codec.encode(message))
+        async with self.write_lock:
+            self.writer.write(payload)
+            await self.writer.drain()
+        metrics.increment("server.bytes_out", len(payload))
+        return len(payload)
 
 class AsyncServer:
-    def __init__(self, host, port):
+    def __init__(self, host, port, storage=None, max_frame_size=MAX_FRAME_SIZE, max_in_flight=MAX_IN_FLIGHT,
+                 reuse_port=False, shared_sessions=False, max_connections=None, max_concurrency=None,
+                 rate_limits=None, command_timeout=None):
         self.host = host
         self.port = port
+        # 单条消息的最大字节数
+        self.max_frame_size = max_frame_size
+        self.max_in_flight = max_in_flight
+        # 准入控制：同时保持的连接数上限、全部连接同时处理的命令数上限，为 None 时不限制。
+        # 超出上限的连接与命令直接回复错误，不排队等待
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.connections = 0
+        self.active_commands = 0
+        # 单条命令的最长处理时间（秒），为 None 时只受请求自带的 timeout / deadline 约束
+        self.command_timeout = command_timeout
+        # 多进程部署：各进程以 SO_REUSEPORT 监听同一端口，由内核分配连接，会话保存在共享存储中
+        self.reuse_port = reuse_port
         self.server = None
-        self.command_handler = CommandHandler()
-        self.auth_service = AuthService()
+        self.storage = storage or get_storage()
+        # rate_limits 为 命令类别 -> (每秒速率, 突发上限)，见 utils/rate_limit.py
+        self.command_handler = CommandHandler(self.storage, shared_sessions, RateLimiter(rate_limits))
+        # 与命令处理器共用同一个认证服务，会话只保存一份
+        self.auth_service = self.command_handler.auth_service
+        self._cleanup_task = None
     
     async def start(self):
         # 初始化管理员用户
         await self.auth_service.init_admin_user()
+        self._cleanup_task = asyncio.create_task(self.cleanup_sessions())
         
         self.server = await asyncio.start_server(
-            self.handle_client, self.host, self.port
+            self.handle_client, self.host, self.port,
+            # ndjson 分帧按行读取，单行上限即 StreamReader 的缓冲上限
+            limit=self.max_frame_size,
+            reuse_port=self.reuse_port or None
         )
         # 获取服务器实际监听的IP地址和端口
         server_address = self.server.sockets[0].getsockname() if self.server.sockets else (self.host, self.port)
         actual_host = server_address[0]
         actual_port = server_address[1]
-        print(f"Server started on {actual_host}:{actual_port}")
-        print(f"Listening for incoming connections...")
+        logger.info("Server started", extra={"fields": {"host": actual_host, "port": actual_port, "pid": os.getpid()}})
         async with self.server:
             await self.server.serve_forever()
     
     async def handle_client(self, reader, writer):
-        client_addr = writer.get_extra_info('peername')
-        print(f"Client connected: {client_addr}")
+        # 未发送 HELLO 的客户端保持旧的分帧方式
+        conn = ClientConnection(reader, writer, LegacyFraming(self.max_frame_size), create_codec(), self.max_in_flight)
+        client = conn.client
+        if self.max_connections is not None and self.connections >= self.max_connections:
+            await self.reject_connection(conn)
+            return
+        self.connections += 1
+        logger.info("Client connected", extra={"fields": {"client": client}})
+        metrics.increment("server.connections")
+        next_read = None
         
         try:
             while True:
-                # 异步接收数据
-                data = await reader.read(4096)
-                if not data:
+                # 异步接收一条完整消息
+                try:
+                    if next_read is None:
+                        payload = await conn.framing.read_frame(reader)
+                    else:
+                        # 旧分帧在处理上一条请求期间已开始读取这一条
+                        payload, next_read = await next_read, None
+                except FrameError as e:
+                    # 分帧出错后无法找到下一条消息的边界，回复错误后断开连接
+                    logger.warning("Invalid frame", extra={"fields": {"client": client, "error": str(e)}})
+                    await conn.wait_in_flight()
+                    await conn.send({
+                        "status": "error",
+                        "message": f"Invalid frame: {e}",
+                        "command": "unknown"
+                    })
+                    break
+                if payload is None:
                     break
+                metrics.increment("server.bytes_in", len(payload))
                 
                 try:
                     # 解析客户端消息
-                    message = json.loads(data.decode())
+                    message = conn.codec.decode(payload)
                     command = message.get("command")
-                    data = message.get("data", {})
-                    session_id = message.get("session_id")
-                    
-                    print(f"Received command: {command} from {client_addr}")
-                    
-                    # 处理命令
-                    response = await self.command_handler.handle_command(command, data, session_id)
                     
-                    # 添加响应的客户端信息
-                    response["client_id"] = message.get("client_id")
-                    response["timestamp"] = message.get("timestamp")
+                    if command == "HELLO":
+                        # HELLO 属于连接层命令：等已受理的请求全部响应后，按协商前的分帧与编码回复再切换
+                        await conn.wait_in_flight()
+                        start = time.perf_counter()
+                        response, negotiated = self.handle_hello(message.get("data", {}))
+                        await conn.send(self.with_client_info(response, message))
+                        self.log_command(conn, message, response, start)
+                        if negotiated:
+                            conn.framing, conn.codec = negotiated
+                            if not conn.supports_push:
+                                conn.close_subscriptions()
+                    elif conn.framing.pipelined:
+                        # 分帧协议下同一连接的请求并发处理，响应可能乱序，客户端按 request_id 对应；
+                        # 在途请求达到上限时暂停读取
+                        await conn.in_flight.acquire()
+                        conn.start(self.process_message(conn, message, len(payload)))
+                    else:
+                        next_read = await self.process_sequential(conn, message, len(payload))
                     
-                    # 异步发送响应
-                    writer.write(json.dumps(response).encode())
-                    await writer.drain()
-                    
-                except json.JSONDecodeError as e:
-                    # 处理JSON解析错误
+                except MessageError as e:
+                    # 处理消息解码错误
+                    logger.warning("Invalid message", extra={"fields": {"client": client, "error": str(e)}})
                     error_response = {
                         "status": "error",
-                        "message": f"Invalid JSON format: {e}",
+                        "message": f"Invalid {conn.codec.label} format: {e}",
                         "command": "unknown"
                     }
-                    writer.write(json.dumps(error_response).encode())
-                    await writer.drain()
+                    await conn.send(error_response)
                 except Exception as e:
                     # 处理其他错误
                     error_response = {
@@ -74,19 +238,217 @@ class AsyncServer:
                         "message": f"Internal server error: {e}",
                         "command": "unknown"
                     }
-                    writer.write(json.dumps(error_response).encode())
-                    await writer.drain()
-                    print(f"Error handling client {client_addr}: {e}")
+                    await conn.send(error_response)
+                    logger.exception("Error handling client", extra={"fields": {"client": client}})
+            
+            # 分帧协议的客户端关闭连接（含只关闭写方向）即视为放弃尚未完成的请求，取消后等待其结束；
+            # 旧分帧此时已没有在途请求
+            conn.cancel_in_flight()
+            await conn.wait_in_flight()
         
-        except Exception as e:
-            print(f"Unexpected error with client {client_addr}: {e}")
+        except ConnectionError as e:
+            logger.info("Client connection lost", extra={"fields": {"client": client, "error": str(e)}})
+        except Exception:
+            logger.exception("Unexpected error with client", extra={"fields": {"client": client}})
         finally:
+            self.connections -= 1
+            if next_read is not None:
+                next_read.cancel()
+            # 连接异常断开或服务器关闭时取消在途请求；客户端正常关闭时它们已在上面取消并结束
+            conn.cancel_in_flight()
+            conn.close_subscriptions()
             writer.close()
-            await writer.wait_closed()
-            print(f"Client disconnected: {client_addr}")
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+            logger.info("Client disconnected", extra={"fields": {"client": client}})
+    
+    async def reject_connection(self, conn):
+        # 连接数已满：以旧分帧回复一条错误后立即关闭
+        metrics.increment("server.rejected.connections")
+        logger.warning("Connection rejected", extra={"fields": {"client": conn.client, "connections": self.connections}})
+        try:
+            await conn.send({
+                "status": "error",
+                "message": "Server busy: too many connections",
+                "command": "unknown"
+            })
+        except ConnectionError:
+            pass
+        conn.writer.close()
+        try:
+            await conn.writer.wait_closed()
+        except ConnectionError:
+            pass
+    
+    async def process_sequential(self, conn, message, size):
+        # 旧分帧没有消息边界，请求逐条处理；处理期间同时读取下一条消息以发现连接被重置：
+        # 读取出错时取消当前请求；读到数据时留到下一轮处理。旧客户端发送请求后可能只关闭写方向，
+        # 读到 EOF 只表示不再有新请求，当前请求照常完成并回复。返回该读取任务
+        await conn.in_flight.acquire()
+        task = conn.start(self.process_message(conn, message, size))
+        next_read = asyncio.create_task(conn.framing.read_frame(conn.reader))
+        try:
+            await asyncio.wait([task, next_read], return_when=asyncio.FIRST_COMPLETED)
+            if not task.done() and next_read.exception() is not None:
+                conn.cancel_in_flight()
+            await conn.wait_in_flight()
+        except BaseException:
+            next_read.cancel()
+            raise
+        return next_read
+    
+    async def process_message(self, conn, message, size=0):
+        # size 为请求消息的字节数，与响应字节数一起按命令记入 command.<命令名>.bytes_in / bytes_out
+        command = message.get("command")
+        data = message.get("data", {})
+        session_id = message.get("session_id")
+        start = time.perf_counter()
+        try:
+            timeout = self.command_timeout_of(message)
+        except ValueError as e:
+            timeout = None
+            response = {
+                "status": "error",
+                "message": str(e),
+                "command": command or "unknown"
+            }
+        else:
+            response = await self.run_command(conn, command, data, session_id, timeout)
+        
+        # 异步发送响应
+        name = f"command.{self.command_handler.metric_name(command)}"
+        metrics.increment(f"{name}.bytes_in", size)
+        try:
+            metrics.increment(f"{name}.bytes_out", await conn.send(self.with_client_info(response, message)))
+        except ConnectionError as e:
+            # 客户端已经离开，同一连接上其余在途请求的结果也无法送达
+            logger.warning("Failed to send response", extra={"fields": {"client": conn.client, "command": command, "error": str(e)}})
+            conn.cancel_in_flight()
+        self.log_command(conn, message, response, start)
+    
+    def command_timeout_of(self, message):
+        # 请求可带 timeout（秒）或 deadline（Unix 时间戳，秒），与服务器的 command_timeout 取最早者；
+        # 返回剩余的处理时间，None 表示不限。参数不合法时抛出 ValueError
+        timeouts = [] if self.command_timeout is None else [self.command_timeout]
+        for key in ("timeout", "deadline"):
+            value = message.get(key)
+            if value is None:
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"{key} must be a number")
+            timeouts.append(value if key == "timeout" else value - time.time())
+        return min(timeouts) if timeouts else None
+    
+    async def run_command(self, conn, command, data, session_id, timeout):
+        if timeout is not None and timeout <= 0:
+            # 到达时已经超过截止时间，不再处理
+            metrics.increment("server.rejected.deadline")
+            return {
+                "status": "error",
+                "message": "Deadline exceeded",
+                "command": command or "unknown"
+            }
+        if self.max_concurrency is not None and self.active_commands >= self.max_concurrency:
+            # 全局并发预算用尽时直接拒绝，已受理命令的延迟不受影响
+            metrics.increment("server.rejected.busy")
+            return {
+                "status": "error",
+                "message": "Server busy: try again later",
+                "command": command or "unknown"
+            }
+        
+        self.active_commands += 1
+        try:
+            # 处理命令；超过截止时间时取消处理函数，存储的写入会在完成后才响应取消
+            return await asyncio.wait_for(
+                self.command_handler.handle_command(command, data, session_id, conn), timeout
+            )
+        except asyncio.TimeoutError:
+            metrics.increment("server.deadline_exceeded")
+            return {
+                "status": "error",
+                "message": "Deadline exceeded",
+                "command": command or "unknown"
+            }
+        except asyncio.CancelledError:
+            metrics.increment("server.cancelled")
+            raise
+        except Exception as e:
+            logger.exception("Error handling command", extra={"fields": {"client": conn.client, "command": command}})
+            return {
+                "status": "error",
+                "message": f"Internal server error: {e}",
+                "command": command or "unknown"
+            }
+        finally:
+            self.active_commands -= 1
+    
+    def log_command(self, conn, message, response, start):
+        # 每条命令一条请求日志，按命令采样；失败的命令总会记录
+        command = message.get("command")
+        failed = response.get("status") != "success"
+        level = logging.WARNING if failed else logging.INFO
+        if not logger.isEnabledFor(level) or not (failed or sampler.should_log(command)):
+            return
+        logger.log(level, "Command handled", extra={"fields": {
+            "command": command,
+            "client": conn.client,
+            "status": response.get("status"),
+            "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+            "request_id": message.get("request_id"),
+            "sample_rate": 1.0 if failed else sampler.rate(command)
+        }})
+    
+    def with_client_info(self, response, message):
+        # 添加响应的客户端信息，request_id 用于在流水线模式下匹配乱序返回的响应
+        response["client_id"] = message.get("client_id")
+        response["timestamp"] = message.get("timestamp")
+        if "request_id" in message:
+            response["request_id"] = message["request_id"]
+        return response
+    
+    def handle_hello(self, data):
+        # 返回 (响应, (分帧, 编码))；协商失败时第二项为 None，连接保持当前协议
+        try:
+            framing, codec, info = negotiate(data, self.max_frame_size)
+        except ValueError as e:
+            return {
+                "status": "error",
+                "message": str(e),
+                "command": "HELLO"
+            }, None
+        info["max_in_flight"] = self.max_in_flight
+        return {
+            "status": "success",
+            "data": info,
+            "message": f"Switched to {framing.name} framing with {codec.name} codec",
+            "command": "HELLO"
+        }, (framing, codec)
+    
+    async def cleanup_sessions(self):
+        # 定期移除过期会话；多进程部署时同时删除共享存储中的过期会话，否则 sessions 集合只增不减
+        while True:
+            await asyncio.sleep(SESSION_CLEANUP_INTERVAL)
+            try:
+                removed = await self.auth_service.cleanup_expired_sessions()
+            except Exception:
+                logger.exception("Failed to clean up expired sessions")
+                continue
+            if removed:
+                logger.info("Expired sessions removed", extra={"fields": {"count": removed}})
     
     async def stop(self):
+        if self._cleanup_task is not None:
+            self._cleanup_task.cancel()
+            await asyncio.gather(self._cleanup_task, return_exceptions=True)
+            self._cleanup_task = None
         if self.server:
             self.server.close()
             await self.server.wait_closed()
-            print("Server stopped")
\ No newline at end of file
+            logger.info("Server stopped")
+        # 写出尚未结束的性能分析
+        await profiler.close()
+        # 确保成批落盘模式下尚未写盘的变更被刷新
+        await self.storage.close()
\ No newline at end of file
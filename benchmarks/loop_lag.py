@@ -0,0 +1,66 @@
+# 测量大集合冷加载与整表写回期间事件循环的最大停顿，比较不同的 offload 方式与磁盘格式
+# 用法（在包的上级目录执行）：python -m <包名>.benchmarks.loop_lag [记录数]
+import sys
+import time
+import asyncio
+import tempfile
+from ..data.storage import Storage
+from ..data.backends import OFFLOAD_MODES
+
+FORMATS = ("json", "compact")
+TICK = 0.001
+
+def player(i):
+    return {
+        "id": f"player-{i:08d}",
+        "name": f"Player {i}",
+        "position": "FW",
+        "qq": str(10000 + i),
+        "game_id": f"game-{i}",
+        "club": f"club-{i % 200}",
+        "national_team": f"nt-{i % 50}",
+        "stats": {"goals": i % 30, "assists": i % 20, "appearances": i % 40}
+    }
+
+async def max_lag(coro):
+    # 返回 (耗时, 期间事件循环最长一次未能按时唤醒的秒数)
+    lag = 0.0
+    done = False
+    
+    async def ticker():
+        nonlocal lag
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lag = max(lag, time.perf_counter() - start - TICK)
+    
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK)
+    start = time.perf_counter()
+    await coro
+    elapsed = time.perf_counter() - start
+    done = True
+    await task
+    return elapsed, lag
+
+async def measure(count, fmt, offload):
+    with tempfile.TemporaryDirectory() as base_dir:
+        storage = Storage(base_dir, backend_options={"format": fmt, "offload": offload})
+        await storage.create_many("players", [player(i) for i in range(count)])
+        storage.invalidate("players")
+        load = await max_lag(storage.get_all("players"))
+        write = await max_lag(storage.create("players", player(count)))
+        await storage.close()
+    return load, write
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 60000
+    print(f"{count} records")
+    print(f"{'format':<10}{'offload':<10}{'load s':>10}{'load lag':>10}{'write s':>10}{'write lag':>10}")
+    for fmt in FORMATS:
+        for offload in OFFLOAD_MODES:
+            (load, load_lag), (write, write_lag) = await measure(count, fmt, offload)
+            print(f"{fmt:<10}{offload:<10}{load:>10.3f}{load_lag:>10.3f}{write:>10.3f}{write_lag:>10.3f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
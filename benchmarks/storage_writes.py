@@ -0,0 +1,39 @@
+# 比较不同持久化后端与 fsync 策略下的写入吞吐
+# 用法（在包的上级目录执行）：python -m <包名>.benchmarks.storage_writes [记录数]
+import sys
+import time
+import asyncio
+import tempfile
+from ..data.storage import Storage
+
+CONFIGS = [
+    ("json", "none"),
+    ("json", "periodic"),
+    ("json", "always"),
+    ("journal", "none"),
+    ("journal", "periodic"),
+    ("journal", "always")
+]
+
+async def run(backend, fsync, count):
+    with tempfile.TemporaryDirectory() as base_dir:
+        storage = Storage(base_dir, backend=backend, backend_options={"fsync": fsync})
+        for i in range(count):
+            await storage.create("matches", {"id": str(i), "home_team": "A", "away_team": "B", "status": "scheduled"})
+        
+        start = time.perf_counter()
+        for i in range(count):
+            await storage.update("matches", str(i), {"id": str(i), "home_team": "A", "away_team": "B", "status": "completed"})
+        elapsed = time.perf_counter() - start
+        await storage.close()
+    return elapsed
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print(f"{'backend':<10}{'fsync':<10}{'updates/s':>12}")
+    for backend, fsync in CONFIGS:
+        elapsed = await run(backend, fsync, count)
+        print(f"{backend:<10}{fsync:<10}{count / elapsed:>12.1f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
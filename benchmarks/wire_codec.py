@@ -0,0 +1,80 @@
+# 比较 JSON 与 msgpack 两种消息编码在现有命令上的编解码耗时与消息大小
+# 用法（在包的上级目录执行）：python -m <包名>.benchmarks.wire_codec [记录数] [重复次数]
+import sys
+import zlib
+import time
+import asyncio
+import tempfile
+from ..data.storage import Storage
+from ..command_handler import CommandHandler
+from ..protocol import CODECS, available_codecs, create_codec, DEFAULT_COMPRESSION_LEVEL
+
+def player(i):
+    return {"name": f"Player {i}", "position": "FW", "qq": str(10000 + i), "game_id": f"game-{i}", "age": 20 + i % 15}
+
+def match(i, clubs):
+    return {
+        "home_team": clubs[i % len(clubs)]["id"],
+        "away_team": clubs[(i + 1) % len(clubs)]["id"],
+        "match_time": "2026-01-01 20:00",
+        "location": f"Stadium {i % 20}"
+    }
+
+async def collect_messages(count):
+    # 在临时数据目录中造数，执行现有命令并收集 (名称, 消息) 列表，请求与响应都参与比较
+    with tempfile.TemporaryDirectory() as base_dir:
+        storage = Storage(base_dir)
+        handler = CommandHandler(storage)
+        await handler.auth_service.init_admin_user()
+        login = await handler.handle_command("LOGIN", {"username": "admin", "password": "admin123"}, None)
+        session_id = login["data"]["session_id"]
+        
+        add_players = {"players": [player(i) for i in range(count)]}
+        clubs = (await handler.handle_command("ADD_CLUBS", {"clubs": [
+            {"name": f"Club {i}", "league": "L1", "league_level": "level-1", "home_stadium": f"Stadium {i}", "coach": f"Coach {i}"}
+            for i in range(20)
+        ]}, session_id))["data"]
+        await handler.handle_command("ADD_PLAYERS", add_players, session_id)
+        await handler.handle_command("ADD_MATCHES", {"matches": [match(i, clubs) for i in range(count)]}, session_id)
+        
+        messages = [
+            ("PING request", {"command": "PING", "request_id": 1}),
+            ("PING response", await handler.handle_command("PING", {}, session_id)),
+            ("GET_CLUB response", await handler.handle_command("GET_CLUB", {"id": clubs[0]["id"]}, session_id)),
+            ("GET_PLAYERS page", await handler.handle_command("GET_PLAYERS", {"limit": 100}, session_id)),
+            ("GET_PLAYERS response", await handler.handle_command("GET_PLAYERS", {}, session_id)),
+            ("GET_MATCHES response", await handler.handle_command("GET_MATCHES", {}, session_id)),
+            ("ADD_PLAYERS request", {"command": "ADD_PLAYERS", "session_id": session_id, "data": add_players})
+        ]
+        await storage.close()
+    return messages
+
+def measure(codec, message, repeat):
+    payload = codec.encode(message)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        codec.encode(message)
+    encode_time = (time.perf_counter() - start) / repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        codec.decode(payload)
+    decode_time = (time.perf_counter() - start) / repeat
+    compressed = len(zlib.compress(payload, DEFAULT_COMPRESSION_LEVEL))
+    return len(payload), compressed, encode_time, decode_time
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    codecs = available_codecs()
+    if len(codecs) < len(CODECS):
+        print("msgpack is not installed, only JSON is measured")
+    
+    messages = await collect_messages(count)
+    print(f"{'message':<24}{'codec':<10}{'bytes':>10}{'zlib':>10}{'encode ms':>12}{'decode ms':>12}")
+    for name, message in messages:
+        for codec_name in codecs:
+            size, compressed, encode_time, decode_time = measure(create_codec(codec_name), message, repeat)
+            print(f"{name:<24}{codec_name:<10}{size:>10}{compressed:>10}{encode_time * 1000:>12.3f}{decode_time * 1000:>12.3f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
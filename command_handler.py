@@ -1,3 +1,6 @@
+import math
+import time
+import asyncio
 from .services import (
     AuthService,
     PlayerService,
@@ -7,46 +10,38 @@ from .services import (
     MatchService,
     PromotionService
 )
+from .data.storage import get_storage
 from .utils.permissions import Permissions
+from .utils.pagination import parse_page, encode_cursor
+from .utils.events import event_bus, parse_filters
+from .utils.metrics import metrics
+from .utils.profiler import profiler
+from .utils.rate_limit import RateLimiter
+
+# 单个 BATCH 中的子命令数上限
+MAX_BATCH_COMMANDS = 100
+# 改变会话状态的命令不能放在 BATCH 中
+BATCH_EXCLUDED_COMMANDS = ("LOGIN", "LOGOUT", "BATCH")
+# 单个连接同时保持的订阅数上限
+MAX_SUBSCRIPTIONS = 16
+# 不经过 handlers 分发、但需要单独统计的命令
+BUILTIN_COMMANDS = ("LOGIN", "PING", "BATCH")
 
 class CommandHandler:
-    def __init__(self):
-        self.auth_service = AuthService()
-        self.player_service = PlayerService()
-        self.club_service = ClubService()
-        self.league_service = LeagueService()
-        self.national_team_service = NationalTeamService()
-        self.match_service = MatchService()
-        self.promotion_service = PromotionService()
-    
-    async def handle_command(self, command, data, session_id):
-        # 权限验证
-        user = self.auth_service.get_user_from_session(session_id)
-        
-        # 无需权限的命令
-        if command == "LOGIN":
-            return await self.handle_login(data)
-        
-        if command == "PING":
-            return self.handle_ping()
-        
-        # 需要权限验证的命令
-        if not user:
-            return {
-                "status": "error",
-                "message": "Unauthorized: Please login first",
-                "command": command
-            }
-        
-        if not Permissions.can_perform_action(user, command):
-            return {
-                "status": "error",
-                "message": "Forbidden: You don't have permission to perform this action",
-                "command": command
-            }
-        
-        # 处理具体命令
-        handlers = {
+    def __init__(self, storage=None, shared_sessions=False, rate_limiter=None):
+        # 所有服务共用同一个 Storage 实例；多进程部署时会话也保存在存储中
+        self.storage = storage or get_storage()
+        self.auth_service = AuthService(self.storage, shared_sessions)
+        self.player_service = PlayerService(self.storage)
+        self.club_service = ClubService(self.storage)
+        self.league_service = LeagueService(self.storage)
+        self.national_team_service = NationalTeamService(self.storage)
+        self.match_service = MatchService(self.storage)
+        self.promotion_service = PromotionService(self.storage)
+        # 按会话与命令类别限流，默认不限流
+        self.rate_limiter = rate_limiter or RateLimiter()
+        # 需要权限验证的命令及其处理函数
+        self.handlers = {
             "LOGOUT": self.handle_logout,
             "GET_USER_INFO": self.handle_get_user_info,
             "GET_PLAYERS": self.handle_get_players,
@@ -54,11 +49,17 @@ class CommandHandler:
             "ADD_PLAYER": self.handle_add_player,
             "UPDATE_PLAYER": self.handle_update_player,
             "DELETE_PLAYER": self.handle_delete_player,
+            "ADD_PLAYERS": self.handle_add_players,
+            "UPDATE_PLAYERS": self.handle_update_players,
+            "DELETE_PLAYERS": self.handle_delete_players,
             "GET_CLUBS": self.handle_get_clubs,
             "GET_CLUB": self.handle_get_club,
             "ADD_CLUB": self.handle_add_club,
             "UPDATE_CLUB": self.handle_update_club,
             "DELETE_CLUB": self.handle_delete_club,
+            "ADD_CLUBS": self.handle_add_clubs,
+            "UPDATE_CLUBS": self.handle_update_clubs,
+            "DELETE_CLUBS": self.handle_delete_clubs,
             "GET_LEAGUES": self.handle_get_leagues,
             "GET_LEAGUE": self.handle_get_league,
             "ADD_LEAGUE": self.handle_add_league,
@@ -79,11 +80,132 @@ class CommandHandler:
             "ADD_MATCH": self.handle_add_match,
             "UPDATE_MATCH": self.handle_update_match,
             "DELETE_MATCH": self.handle_delete_match,
-            "EXECUTE_PROMOTION_RELEGATION": self.handle_execute_promotion_relegation
+            "ADD_MATCHES": self.handle_add_matches,
+            "UPDATE_MATCHES": self.handle_update_matches,
+            "DELETE_MATCHES": self.handle_delete_matches,
+            "EXECUTE_PROMOTION_RELEGATION": self.handle_execute_promotion_relegation,
+            "STATS": self.handle_stats,
+            "PROFILE": self.handle_profile
+        }
+        # 需要访问客户端连接的命令，处理函数额外接收连接对象
+        self.connection_handlers = {
+            "SUBSCRIBE": self.handle_subscribe,
+            "UNSUBSCRIBE": self.handle_unsubscribe
+        }
+    
+    def metric_name(self, command):
+        # 指标中使用的命令名；未知命令合并为 unknown，避免客户端随意构造的命令名撑大指标表
+        if isinstance(command, str) and (
+            command in self.handlers or command in self.connection_handlers or command in BUILTIN_COMMANDS
+        ):
+            return command
+        return "unknown"
+    
+    async def handle_command(self, command, data, session_id, connection=None):
+        # connection 为发起请求的客户端连接，用于推送订阅事件；直接调用时可以省略。
+        # 耗时记入 command.<命令名>，失败次数记入 command.<命令名>.errors
+        name = f"command.{self.metric_name(command)}"
+        start = time.perf_counter()
+        coro = self._handle_command(command, data, session_id, connection)
+        if profiler.session is not None:
+            coro = profiler.run(command, coro)
+        try:
+            response = await coro
+        except BaseException:
+            metrics.increment(f"{name}.errors")
+            raise
+        finally:
+            metrics.observe(name, time.perf_counter() - start)
+        if response.get("status") != "success":
+            metrics.increment(f"{name}.errors")
+        return response
+    
+    def command_class(self, command, data):
+        # 返回限流使用的 (命令类别, 消耗的令牌数)；BATCH 按子命令数计，子命令全部只读时算作 read
+        if command == "BATCH":
+            commands = data.get("commands") if isinstance(data, dict) else None
+            if not isinstance(commands, list) or not commands:
+                return "write", 1
+            read_only = all(
+                isinstance(item, dict) and isinstance(item.get("command"), str)
+                and Permissions.is_read_only(item["command"])
+                for item in commands
+            )
+            return "read" if read_only else "write", len(commands)
+        if isinstance(command, str) and Permissions.is_read_only(command):
+            return "read", 1
+        return "write", 1
+    
+    def check_rate_limit(self, key, command_class, command, tokens=1):
+        # 超出限额时返回错误响应，否则返回 None
+        retry_after = self.rate_limiter.check(key, command_class, tokens)
+        if not retry_after:
+            return None
+        metrics.increment(f"rate_limit.{command_class}.rejected")
+        if math.isinf(retry_after):
+            # 重试也不会成功，不给出 retry_after，客户端应拆分成较小的 BATCH
+            burst = self.rate_limiter.limits[command_class][1]
+            return {
+                "status": "error",
+                "message": f"{command} of {tokens} commands exceeds the {command_class} rate limit burst of {burst:g}",
+                "command": command
+            }
+        return {
+            "status": "error",
+            "data": {"retry_after": round(retry_after, 3)},
+            "message": "Rate limit exceeded",
+            "command": command
         }
+    
+    async def _handle_command(self, command, data, session_id, connection):
+        # 无需权限的命令；LOGIN 还没有会话，按客户端地址限流
+        if command == "LOGIN":
+            host = connection.address[0] if connection is not None and connection.address else None
+            limited = self.check_rate_limit(host, "login", command)
+            if limited:
+                return limited
+            return await self.handle_login(data)
+        
+        if command == "PING":
+            return self.handle_ping()
+        
+        # 权限验证；共享会话时可能需要从存储中读取会话
+        user = await self.auth_service.resolve_session(session_id)
+        
+        # 需要权限验证的命令
+        if not user:
+            return {
+                "status": "error",
+                "message": "Unauthorized: Please login first",
+                "command": command
+            }
+        
+        # 会话已验证，客户端无法通过伪造会话 id 绕过限流
+        command_class, tokens = self.command_class(command, data)
+        limited = self.check_rate_limit(session_id, command_class, command, tokens)
+        if limited:
+            return limited
+        
+        # BATCH 本身不需要权限，其中每条子命令单独校验
+        if command == "BATCH":
+            return await self.handle_batch(data, session_id, user, connection)
+        
+        return await self.dispatch(command, data, session_id, user, connection)
+    
+    async def dispatch(self, command, data, session_id, user, connection=None):
+        # user 为已解析的会话用户
+        if not Permissions.can_perform_action(user, command):
+            return {
+                "status": "error",
+                "message": "Forbidden: You don't have permission to perform this action",
+                "command": command
+            }
         
-        if command in handlers:
-            return await handlers[command](data, session_id)
+        # 处理具体命令
+        if command in self.handlers:
+            return await self.handlers[command](data, session_id)
+        if command in self.connection_handlers:
+            return await self.connection_handlers[command](data, session_id, connection)
         
         return {
             "status": "error",
@@ -91,6 +213,84 @@ class CommandHandler:
             "command": command
         }
     
+    # 批处理命令
+    async def handle_batch(self, data, session_id, user, connection=None):
+        commands = data.get("commands")
+        if not isinstance(commands, list) or not commands:
+            return {
+                "status": "error",
+                "message": "Missing commands",
+                "command": "BATCH"
+            }
+        if len(commands) > MAX_BATCH_COMMANDS:
+            return {
+                "status": "error",
+                "message": f"Too many commands in batch (max {MAX_BATCH_COMMANDS})",
+                "command": "BATCH"
+            }
+        
+        # 子命令按顺序执行；concurrent 为真时相邻的只读命令并发执行，写命令仍按顺序执行。
+        # 整个批处理中的写操作推迟到结束时按集合统一落盘
+        concurrent = bool(data.get("concurrent"))
+        results = []
+        async with self.storage.batch():
+            index = 0
+            while index < len(commands):
+                end = index + 1
+                if concurrent and self._is_batch_read(commands[index]):
+                    while end < len(commands) and self._is_batch_read(commands[end]):
+                        end += 1
+                group = commands[index:end]
+                if len(group) > 1:
+                    results.extend(await asyncio.gather(*[
+                        self._run_batch_item(item, session_id, user, connection) for item in group
+                    ]))
+                else:
+                    results.append(await self._run_batch_item(group[0], session_id, user, connection))
+                index = end
+        
+        failed = sum(1 for result in results if result.get("status") != "success")
+        return {
+            "status": "success",
+            "data": results,
+            "message": f"{len(results)} commands executed, {failed} failed",
+            "command": "BATCH"
+        }
+    
+    def _is_batch_read(self, item):
+        return isinstance(item, dict) and Permissions.is_read_only(item.get("command"))
+    
+    async def _run_batch_item(self, item, session_id, user, connection=None):
+        if not isinstance(item, dict) or not isinstance(item.get("data", {}), dict):
+            return {
+                "status": "error",
+                "message": "Invalid batch item",
+                "command": "unknown"
+            }
+        command = item.get("command")
+        if command in BATCH_EXCLUDED_COMMANDS:
+            return {
+                "status": "error",
+                "message": f"{command} is not allowed in BATCH",
+                "command": command
+            }
+        
+        try:
+            if command == "PING":
+                result = self.handle_ping()
+            else:
+                result = await self.dispatch(command, item.get("data", {}), session_id, user, connection)
+        except Exception as e:
+            # 单条子命令失败不影响其余子命令
+            result = {
+                "status": "error",
+                "message": f"Internal server error: {e}",
+                "command": command
+            }
+        if "request_id" in item:
+            result["request_id"] = item["request_id"]
+        return result
+    
     # 命令处理函数
     async def handle_login(self, data):
         username = data.get("username")
@@ -155,16 +355,195 @@ class CommandHandler:
             "command": "PING"
         }
     
-    # 球员管理命令
-    async def handle_get_players(self, data, session_id):
-        players = await self.player_service.get_all_players()
+    # 运行指标：当前进程的计数器与耗时分位数，reset 为 true 时读取后清零
+    async def handle_stats(self, data, session_id):
+        snapshot = metrics.snapshot()
+        if data.get("reset"):
+            metrics.reset()
         return {
             "status": "success",
-            "data": players,
-            "message": "Players retrieved",
-            "command": "GET_PLAYERS"
+            "data": snapshot,
+            "message": "Stats retrieved",
+            "command": "STATS"
         }
     
+    # 性能分析：action 为 start / stop / status。start 时 duration（秒）与 requests（命令数）
+    # 至少给出一个，先到者结束采集；command 限定只采集某一种命令，filename 为输出的 .prof 文件名
+    async def handle_profile(self, data, session_id):
+        action = data.get("action", "status")
+        if action == "start":
+            command = data.get("command")
+            if command is not None and self.metric_name(command) == "unknown":
+                return {
+                    "status": "error",
+                    "message": f"Unknown command: {command}",
+                    "command": "PROFILE"
+                }
+            try:
+                info = profiler.start(data.get("duration"), data.get("requests"), command, data.get("filename"))
+            except (ValueError, OSError) as e:
+                return {
+                    "status": "error",
+                    "message": str(e),
+                    "command": "PROFILE"
+                }
+            message = "Profiling started"
+        elif action == "stop":
+            info = await profiler.stop()
+            if info is None:
+                return {
+                    "status": "error",
+                    "message": "No profile is running",
+                    "command": "PROFILE"
+                }
+            if "error" in info:
+                return {
+                    "status": "error",
+                    "data": info,
+                    "message": f"Failed to write profile: {info['error']}",
+                    "command": "PROFILE"
+                }
+            message = "Profile written"
+        elif action == "status":
+            info = profiler.status()
+            message = "Profile running" if info else "No profile is running"
+        else:
+            return {
+                "status": "error",
+                "message": f"Unknown action: {action}",
+                "command": "PROFILE"
+            }
+        return {
+            "status": "success",
+            "data": info,
+            "message": message,
+            "command": "PROFILE"
+        }
+    
+    # 批量命令的参数解析
+    def _parse_bulk_items(self, data, key, required_fields):
+        # 返回记录列表；缺少列表或任一记录缺少必填字段时返回 None
+        items = data.get(key)
+        if not isinstance(items, list) or not items:
+            return None
+        for item in items:
+            if not isinstance(item, dict) or not all(item.get(field) for field in required_fields):
+                return None
+        return items
+    
+    def _parse_bulk_updates(self, data):
+        # [{"id": ..., "updates": {...}}, ...] -> {id: updates}；格式不正确时返回 None
+        items = data.get("updates")
+        if not isinstance(items, list) or not items:
+            return None
+        updates_by_id = {}
+        for item in items:
+            if not isinstance(item, dict) or not item.get("id") or not item.get("updates"):
+                return None
+            updates_by_id[item["id"]] = item["updates"]
+        return updates_by_id
+    
+    def _parse_bulk_ids(self, data):
+        ids = data.get("ids")
+        if not isinstance(ids, list) or not ids:
+            return None
+        return ids
+    
+    async def _list_response(self, data, command, message, get_all, get_page):
+        # 传入 limit 或 cursor 时按 id 顺序分页返回，next_cursor 为 None 表示已是最后一页；否则返回整个集合
+        try:
+            page = parse_page(data)
+        except ValueError as e:
+            return {
+                "status": "error",
+                "message": str(e),
+                "command": command
+            }
+        
+        if page is None:
+            return {
+                "status": "success",
+                "data": await get_all(),
+                "message": message,
+                "command": command
+            }
+        
+        limit, after = page
+        items, next_after = await get_page(limit, after)
+        return {
+            "status": "success",
+            "data": items,
+            "next_cursor": encode_cursor(next_after),
+            "message": message,
+            "command": command
+        }
+    
+    # 订阅命令：匹配的比赛与积分榜变更以 EVENT 消息推送到当前连接
+    async def handle_subscribe(self, data, session_id, connection):
+        if self.auth_service.shared_sessions:
+            # 事件总线只在本进程内传递，多进程部署时订阅者只能收到连接所在 worker 产生的部分事件
+            return {
+                "status": "error",
+                "message": "SUBSCRIBE is not supported when running with multiple workers",
+                "command": "SUBSCRIBE"
+            }
+        if connection is None or not connection.supports_push:
+            return {
+                "status": "error",
+                "message": "SUBSCRIBE requires a framed connection, send HELLO first",
+                "command": "SUBSCRIBE"
+            }
+        if len(connection.subscriptions) >= MAX_SUBSCRIPTIONS:
+            return {
+                "status": "error",
+                "message": f"Too many subscriptions (max {MAX_SUBSCRIPTIONS})",
+                "command": "SUBSCRIBE"
+            }
+        try:
+            filters = parse_filters(data)
+        except ValueError as e:
+            return {
+                "status": "error",
+                "message": str(e),
+                "command": "SUBSCRIBE"
+            }
+        
+        subscription = event_bus.subscribe(filters)
+        connection.add_subscription(subscription)
+        return {
+            "status": "success",
+            "data": {
+                "subscription_id": subscription.id,
+                "filters": filters
+            },
+            "message": "Subscribed",
+            "command": "SUBSCRIBE"
+        }
+    
+    async def handle_unsubscribe(self, data, session_id, connection):
+        subscription_id = data.get("subscription_id")
+        if connection is None or not connection.remove_subscription(subscription_id):
+            return {
+                "status": "error",
+                "message": "Subscription not found",
+                "command": "UNSUBSCRIBE"
+            }
+        return {
+            "status": "success",
+            "message": "Unsubscribed",
+            "command": "UNSUBSCRIBE"
+        }
+    
+    # 球员管理命令
+    async def handle_get_players(self, data, session_id):
+        return await self._list_response(
+            data,
+            "GET_PLAYERS",
+            "Players retrieved",
+            self.player_service.get_all_players,
+            self.player_service.get_players_page
+        )
+    
     async def handle_get_player(self, data, session_id):
         player_id = data.get("id")
         if not player_id:
@@ -258,16 +637,67 @@ class CommandHandler:
             "command": "DELETE_PLAYER"
         }
     
-    # 俱乐部管理命令
-    async def handle_get_clubs(self, data, session_id):
-        clubs = await self.club_service.get_all_clubs()
+    async def handle_add_players(self, data, session_id):
+        players_data = self._parse_bulk_items(data, "players", ["name", "position", "qq", "game_id"])
+        if not players_data:
+            return {
+                "status": "error",
+                "message": "Missing players or required fields",
+                "command": "ADD_PLAYERS"
+            }
+        
+        players = await self.player_service.create_players(players_data)
         return {
             "status": "success",
-            "data": clubs,
-            "message": "Clubs retrieved",
-            "command": "GET_CLUBS"
+            "data": players,
+            "message": f"{len(players)} players created",
+            "command": "ADD_PLAYERS"
+        }
+    
+    async def handle_update_players(self, data, session_id):
+        updates_by_id = self._parse_bulk_updates(data)
+        if not updates_by_id:
+            return {
+                "status": "error",
+                "message": "Missing player IDs or updates",
+                "command": "UPDATE_PLAYERS"
+            }
+        
+        players = await self.player_service.update_players(updates_by_id)
+        return {
+            "status": "success",
+            "data": players,
+            "message": f"{len(players)} players updated",
+            "command": "UPDATE_PLAYERS"
+        }
+    
+    async def handle_delete_players(self, data, session_id):
+        player_ids = self._parse_bulk_ids(data)
+        if not player_ids:
+            return {
+                "status": "error",
+                "message": "Missing player IDs",
+                "command": "DELETE_PLAYERS"
+            }
+        
+        deleted = await self.player_service.delete_players(player_ids)
+        return {
+            "status": "success",
+            "data": {"deleted": deleted},
+            "message": f"{deleted} players deleted",
+            "command": "DELETE_PLAYERS"
         }
     
+    # 俱乐部管理命令
+    async def handle_get_clubs(self, data, session_id):
+        return await self._list_response(
+            data,
+            "GET_CLUBS",
+            "Clubs retrieved",
+            self.club_service.get_all_clubs,
+            self.club_service.get_clubs_page
+        )
+    
     async def handle_get_club(self, data, session_id):
         club_id = data.get("id")
         if not club_id:
@@ -360,16 +790,67 @@ class CommandHandler:
             "command": "DELETE_CLUB"
         }
     
-    # 联赛管理命令
-    async def handle_get_leagues(self, data, session_id):
-        leagues = await self.league_service.get_all_leagues()
+    async def handle_add_clubs(self, data, session_id):
+        clubs_data = self._parse_bulk_items(data, "clubs", ["name", "league", "league_level", "home_stadium", "coach"])
+        if not clubs_data:
+            return {
+                "status": "error",
+                "message": "Missing clubs or required fields",
+                "command": "ADD_CLUBS"
+            }
+        
+        clubs = await self.club_service.create_clubs(clubs_data)
         return {
             "status": "success",
-            "data": leagues,
-            "message": "Leagues retrieved",
-            "command": "GET_LEAGUES"
+            "data": clubs,
+            "message": f"{len(clubs)} clubs created",
+            "command": "ADD_CLUBS"
         }
     
+    async def handle_update_clubs(self, data, session_id):
+        updates_by_id = self._parse_bulk_updates(data)
+        if not updates_by_id:
+            return {
+                "status": "error",
+                "message": "Missing club IDs or updates",
+                "command": "UPDATE_CLUBS"
+            }
+        
+        clubs = await self.club_service.update_clubs(updates_by_id)
+        return {
+            "status": "success",
+            "data": clubs,
+            "message": f"{len(clubs)} clubs updated",
+            "command": "UPDATE_CLUBS"
+        }
+    
+    async def handle_delete_clubs(self, data, session_id):
+        club_ids = self._parse_bulk_ids(data)
+        if not club_ids:
+            return {
+                "status": "error",
+                "message": "Missing club IDs",
+                "command": "DELETE_CLUBS"
+            }
+        
+        deleted = await self.club_service.delete_clubs(club_ids)
+        return {
+            "status": "success",
+            "data": {"deleted": deleted},
+            "message": f"{deleted} clubs deleted",
+            "command": "DELETE_CLUBS"
+        }
+    
+    # 联赛管理命令
+    async def handle_get_leagues(self, data, session_id):
+        return await self._list_response(
+            data,
+            "GET_LEAGUES",
+            "Leagues retrieved",
+            self.league_service.get_all_leagues,
+            self.league_service.get_leagues_page
+        )
+    
     async def handle_get_league(self, data, session_id):
         league_id = data.get("id")
         if not league_id:
@@ -463,16 +944,22 @@ class CommandHandler:
     # 联赛级别管理命令
     async def handle_get_league_levels(self, data, session_id):
         league_id = data.get("league_id")
-        if league_id:
-            league_levels = await self.league_service.get_league_levels(league_id)
-        else:
-            league_levels = await self.league_service.get_all_leagues()
-        return {
-            "status": "success",
-            "data": league_levels,
-            "message": "League levels retrieved",
-            "command": "GET_LEAGUE_LEVELS"
-        }
+        if not league_id:
+            return await self._list_response(
+                data,
+                "GET_LEAGUE_LEVELS",
+                "League levels retrieved",
+                self.league_service.get_all_leagues,
+                self.league_service.get_leagues_page
+            )
+        
+        async def get_all():
+            return await self.league_service.get_league_levels(league_id)
+        
+        async def get_page(limit, after):
+            return await self.league_service.get_league_levels_page(league_id, limit, after)
+        
+        return await self._list_response(data, "GET_LEAGUE_LEVELS", "League levels retrieved", get_all, get_page)
     
     async def handle_add_league_level(self, data, session_id):
         league_id = data.get("league_id")
@@ -567,13 +1054,13 @@ class CommandHandler:
     
     # 国家队管理命令
     async def handle_get_national_teams(self, data, session_id):
-        national_teams = await self.national_team_service.get_all_national_teams()
-        return {
-            "status": "success",
-            "data": national_teams,
-            "message": "National teams retrieved",
-            "command": "GET_NATIONAL_TEAMS"
-        }
+        return await self._list_response(
+            data,
+            "GET_NATIONAL_TEAMS",
+            "National teams retrieved",
+            self.national_team_service.get_all_national_teams,
+            self.national_team_service.get_national_teams_page
+        )
     
     async def handle_get_national_team(self, data, session_id):
         team_id = data.get("id")
@@ -666,13 +1153,13 @@ class CommandHandler:
     
     # 比赛管理命令
     async def handle_get_matches(self, data, session_id):
-        matches = await self.match_service.get_all_matches()
-        return {
-            "status": "success",
-            "data": matches,
-            "message": "Matches retrieved",
-            "command": "GET_MATCHES"
-        }
+        return await self._list_response(
+            data,
+            "GET_MATCHES",
+            "Matches retrieved",
+            self.match_service.get_all_matches,
+            self.match_service.get_matches_page
+        )
     
     async def handle_get_match(self, data, session_id):
         match_id = data.get("id")
@@ -766,6 +1253,57 @@ class CommandHandler:
             "command": "DELETE_MATCH"
         }
     
+    async def handle_add_matches(self, data, session_id):
+        matches_data = self._parse_bulk_items(data, "matches", ["home_team", "away_team", "match_time", "location"])
+        if not matches_data:
+            return {
+                "status": "error",
+                "message": "Missing matches or required fields",
+                "command": "ADD_MATCHES"
+            }
+        
+        matches = await self.match_service.create_matches(matches_data)
+        return {
+            "status": "success",
+            "data": matches,
+            "message": f"{len(matches)} matches created",
+            "command": "ADD_MATCHES"
+        }
+    
+    async def handle_update_matches(self, data, session_id):
+        updates_by_id = self._parse_bulk_updates(data)
+        if not updates_by_id:
+            return {
+                "status": "error",
+                "message": "Missing match IDs or updates",
+                "command": "UPDATE_MATCHES"
+            }
+        
+        matches = await self.match_service.update_matches(updates_by_id)
+        return {
+            "status": "success",
+            "data": matches,
+            "message": f"{len(matches)} matches updated",
+            "command": "UPDATE_MATCHES"
+        }
+    
+    async def handle_delete_matches(self, data, session_id):
+        match_ids = self._parse_bulk_ids(data)
+        if not match_ids:
+            return {
+                "status": "error",
+                "message": "Missing match IDs",
+                "command": "DELETE_MATCHES"
+            }
+        
+        deleted = await self.match_service.delete_matches(match_ids)
+        return {
+            "status": "success",
+            "data": {"deleted": deleted},
+            "message": f"{deleted} matches deleted",
+            "command": "DELETE_MATCHES"
+        }
+    
     # 升降级命令
     async def handle_execute_promotion_relegation(self, data, session_id):
         league_id = data.get("league_id")
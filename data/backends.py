@@ -0,0 +1,384 @@
+import os
+import json
+import pickle
+import shutil
+import asyncio
+import itertools
+import multiprocessing
+import aiofiles
+import aiofiles.os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from .formats import FORMATS, encode, decode
+from ..utils.log import get_logger
+from ..utils.metrics import metrics
+
+# 持久化后端：Storage 负责内存数据与锁，后端只负责把集合读出/写回磁盘。
+# records 为 Storage 内存中的 id -> 记录 字典；changes 为本次写入对应的变更列表，
+# 元素为 ("put", item) / ("delete", item_id) / ("clear",)，为 None 时表示需要整表重写。
+
+# fsync 策略：none 交给操作系统回写；always 每次写入都 fsync；periodic 每隔 fsync_interval 秒统一 fsync
+FSYNC_POLICIES = ("none", "always", "periodic")
+
+# 大集合编解码的执行位置：none 在事件循环内执行；
+# thread 只把带缩进的 JSON 编码放到线程池（纯 Python 编码器会周期性释放 GIL），
+# 解码、日志回放以及 compact / binary 编码都是一次持有 GIL 的 C 调用，放到线程里照样卡住事件循环，
+# 因此仍交给子进程；process 全部放到子进程。
+# 与子进程之间按 CHUNK_SIZE 条记录分批 pickle，主进程每处理一批让出一次事件循环
+OFFLOAD_MODES = ("none", "thread", "process")
+CHUNK_SIZE = 1000
+
+_tmp_counter = itertools.count()
+
+logger = get_logger("storage")
+
+def _file_signature(file_path):
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _fsync_path(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _replay_journal(snapshot, content):
+    # 把日志回放到快照上，返回 (记录列表, 有效日志条数, 无法解析的行号)。
+    # 崩溃时最后一行可能只写了一半；中间的坏行跳过，其后的有效记录照常回放
+    records = {item["id"]: item for item in snapshot}
+    length = 0
+    bad_lines = []
+    for number, line in enumerate(content.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            bad_lines.append(number)
+            continue
+        length += 1
+        op = entry.get("op")
+        if op == "put":
+            records[entry["item"]["id"]] = entry["item"]
+        elif op == "delete":
+            records.pop(entry["id"], None)
+        elif op == "clear":
+            records.clear()
+    return list(records.values()), length, bad_lines
+
+def _dump_chunks(items):
+    return [
+        pickle.dumps(items[start:start + CHUNK_SIZE], pickle.HIGHEST_PROTOCOL)
+        for start in range(0, len(items), CHUNK_SIZE)
+    ]
+
+def _decode_chunks(content):
+    # 在子进程中执行
+    return _dump_chunks(decode(content))
+
+def _replay_chunks(snapshot_content, journal_content):
+    # 在子进程中执行，返回 (分批的记录, 有效日志条数, 无法解析的行号)
+    items, length, bad_lines = _replay_journal(decode(snapshot_content), journal_content)
+    return _dump_chunks(items), length, bad_lines
+
+def _encode_chunks(chunks, fmt):
+    # 在子进程中执行
+    items = []
+    for chunk in chunks:
+        items.extend(pickle.loads(chunk))
+    return encode(items, fmt)
+
+async def _load_chunks(chunks):
+    items = []
+    for chunk in chunks:
+        items.extend(pickle.loads(chunk))
+        await asyncio.sleep(0)
+    return items
+
+async def _pickle_chunks(items):
+    chunks = []
+    for start in range(0, len(items), CHUNK_SIZE):
+        chunks.append(pickle.dumps(items[start:start + CHUNK_SIZE], pickle.HIGHEST_PROTOCOL))
+        await asyncio.sleep(0)
+    return chunks
+
+def _fsync_dir(dir_path):
+    # 目录 fsync 保证 rename 本身落盘；Windows 不支持对目录 fsync
+    if os.name == "posix":
+        _fsync_path(dir_path)
+
+class JsonFileBackend:
+    # 每次写入都整表重写 <collection>.json（临时文件 + 原子替换）
+    compact_interval = None
+    
+    def __init__(self, data_files, fsync="none", fsync_interval=1.0, format="json",
+                 offload="process", offload_threshold=256 * 1024):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+        if format not in FORMATS:
+            raise ValueError(f"Unknown storage format: {format}")
+        if offload not in OFFLOAD_MODES:
+            raise ValueError(f"Unknown offload mode: {offload}")
+        self.data_files = data_files
+        # 写入时使用的编码格式，读取时按文件内容自动识别
+        self.format = format
+        self.fsync = fsync
+        self.sync_interval = fsync_interval if fsync == "periodic" else None
+        # periodic 策略下等待下一次 fsync 的文件
+        self._unsynced = set()
+        # 文件大小达到阈值时把编解码移出事件循环；编码前按该文件上次的大小判断
+        self.offload = offload
+        self.offload_threshold = offload_threshold
+        self._threads = None
+        self._processes = None
+        self._sizes = {}
+    
+    def initialize(self):
+        for file_path in self.data_files.values():
+            if not file_path.exists():
+                with open(file_path, "w", encoding="utf-8") as f:
+                    json.dump([], f, ensure_ascii=False, indent=2)
+    
+    def _thread_executor(self):
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=2, thread_name_prefix="storage-codec")
+        return self._threads
+    
+    def _process_executor(self):
+        if self._processes is None:
+            # 与 main 的多进程部署一样用 spawn：fork 会复制日志 QueueListener 与 aiofiles 的线程状态，可能死锁
+            self._processes = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        return self._processes
+    
+    def _offloaded(self, size):
+        return self.offload != "none" and size >= self.offload_threshold
+    
+    async def _in_process(self, name, fn, *args):
+        # 等待时间记入 storage.<name>.offload_wait
+        metrics.increment(f"storage.{name}.offloaded")
+        loop = asyncio.get_running_loop()
+        with metrics.timer(f"storage.{name}.offload_wait"):
+            return await loop.run_in_executor(self._process_executor(), fn, *args)
+    
+    async def _read_bytes(self, file_path):
+        with metrics.timer("storage.file.read"):
+            async with aiofiles.open(file_path, "rb") as f:
+                content = await f.read()
+        metrics.increment("storage.file.read_bytes", len(content))
+        self._sizes[file_path] = len(content)
+        return content
+    
+    async def _decode(self, content):
+        if not self._offloaded(len(content)):
+            with metrics.timer("storage.decode.inline"):
+                return decode(content)
+        return await _load_chunks(await self._in_process("decode", _decode_chunks, content))
+    
+    async def _encode(self, data, size):
+        # size 为该文件上次的大小，用来在编码前判断是否移出事件循环
+        if not self._offloaded(size):
+            with metrics.timer("storage.encode.inline"):
+                return encode(data, self.format)
+        if self.offload == "thread" and self.format == "json":
+            metrics.increment("storage.encode.offloaded")
+            loop = asyncio.get_running_loop()
+            with metrics.timer("storage.encode.offload_wait"):
+                return await loop.run_in_executor(self._thread_executor(), encode, data, self.format)
+        return await self._in_process("encode", _encode_chunks, await _pickle_chunks(data), self.format)
+    
+    async def _read_file(self, file_path):
+        return await self._decode(await self._read_bytes(file_path))
+    
+    async def _write_file(self, file_path, data, durable=False):
+        content = await self._encode(data, self._sizes.get(file_path, 0))
+        self._sizes[file_path] = len(content)
+        await self._atomic_write(file_path, content, durable)
+    
+    async def _atomic_write(self, file_path, content, durable=False):
+        # 先写同目录下的临时文件再 rename 覆盖，崩溃时文件要么是旧版本要么是新版本
+        tmp_path = file_path.with_name(f"{file_path.name}.{os.getpid()}.{next(_tmp_counter)}.tmp")
+        fsync_now = durable or self.fsync == "always"
+        try:
+            with metrics.timer("storage.file.write"):
+                async with aiofiles.open(tmp_path, "wb") as f:
+                    await f.write(content)
+                    if fsync_now:
+                        await f.flush()
+                        await asyncio.to_thread(os.fsync, f.fileno())
+                await aiofiles.os.replace(tmp_path, file_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        metrics.increment("storage.file.write_bytes", len(content))
+        
+        if fsync_now:
+            await asyncio.to_thread(_fsync_dir, file_path.parent)
+        elif self.fsync == "periodic":
+            self._unsynced.add(file_path)
+    
+    async def _after_append(self, file_path, f):
+        # 追加写入后按策略 fsync，f 为仍处于打开状态的文件
+        if self.fsync == "always":
+            await f.flush()
+            await asyncio.to_thread(os.fsync, f.fileno())
+        elif self.fsync == "periodic":
+            self._unsynced.add(file_path)
+    
+    async def sync(self):
+        # periodic 策略下由 Storage 定期调用
+        paths = list(self._unsynced)
+        self._unsynced.clear()
+        if not paths:
+            return
+        
+        def fsync_all():
+            for path in paths:
+                if path.exists():
+                    _fsync_path(path)
+            for dir_path in {path.parent for path in paths}:
+                _fsync_dir(dir_path)
+        
+        await asyncio.to_thread(fsync_all)
+    
+    def signature(self, collection):
+        return _file_signature(self.data_files[collection])
+    
+    async def load(self, collection):
+        return await self._read_file(self.data_files[collection])
+    
+    async def save(self, collection, records, changes=None):
+        await self._write_file(self.data_files[collection], list(records.values()))
+    
+    def needs_compaction(self, collection):
+        return False
+    
+    def has_pending_changes(self, collection):
+        return False
+    
+    async def compact(self, collection, records):
+        pass
+    
+    async def close(self):
+        await self.sync()
+        for executor in (self._threads, self._processes):
+            if executor is not None:
+                await asyncio.to_thread(executor.shutdown)
+        self._threads = None
+        self._processes = None
+
+class JournalBackend(JsonFileBackend):
+    # <collection>.json 为快照，变更以单行紧凑 JSON 追加到 <collection>.journal，
+    # 启动时回放日志；日志条数超过阈值或定期由 Storage 触发压缩写回快照
+    def __init__(self, data_files, compact_threshold=1000, compact_interval=30, **options):
+        super().__init__(data_files, **options)
+        self.journal_files = {
+            collection: file_path.with_suffix(".journal")
+            for collection, file_path in data_files.items()
+        }
+        self.compact_threshold = compact_threshold
+        self.compact_interval = compact_interval
+        # 各集合日志中尚未压缩的记录条数
+        self.journal_lengths = {}
+    
+    def signature(self, collection):
+        return (
+            _file_signature(self.data_files[collection]),
+            _file_signature(self.journal_files[collection])
+        )
+    
+    async def load(self, collection):
+        snapshot = await self._read_bytes(self.data_files[collection])
+        journal_file = self.journal_files[collection]
+        if not journal_file.exists():
+            self.journal_lengths[collection] = 0
+            return await self._decode(snapshot)
+        
+        with metrics.timer("storage.file.read"):
+            async with aiofiles.open(journal_file, "r", encoding="utf-8") as f:
+                content = await f.read()
+        metrics.increment("storage.file.read_bytes", len(content))
+        
+        if self._offloaded(len(snapshot) + len(content)):
+            # 快照解码与日志回放一起在子进程中完成，快照不必先传回主进程
+            chunks, length, bad_lines = await self._in_process("replay", _replay_chunks, snapshot, content)
+            items = await _load_chunks(chunks)
+        else:
+            with metrics.timer("storage.replay.inline"):
+                items, length, bad_lines = _replay_journal(decode(snapshot), content)
+        self.journal_lengths[collection] = length
+        if bad_lines or (content and not content.endswith("\n")):
+            await self._repair_journal(collection, items, bad_lines)
+        return items
+    
+    async def _repair_journal(self, collection, items, bad_lines):
+        # 日志末尾是写了一半的行或含无法解析的行时，立即把回放结果压缩为新快照；
+        # 否则之后追加的记录会接在残缺的行后面，下次启动时随之丢失。原日志另存一份供排查
+        journal_file = self.journal_files[collection]
+        if bad_lines:
+            backup = journal_file.with_name(f"{journal_file.name}.corrupt")
+            await asyncio.to_thread(shutil.copyfile, journal_file, backup)
+            logger.warning("Skipped unreadable journal lines", extra={"fields": {
+                "collection": collection,
+                "lines": bad_lines[:20],
+                "count": len(bad_lines),
+                "backup": str(backup)
+            }})
+        metrics.increment("storage.journal.repaired")
+        await self.compact(collection, {item["id"]: item for item in items})
+    
+    def _encode_change(self, change):
+        if change[0] == "put":
+            entry = {"op": "put", "item": change[1]}
+        elif change[0] == "delete":
+            entry = {"op": "delete", "id": change[1]}
+        else:
+            entry = {"op": "clear"}
+        return json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+    
+    async def save(self, collection, records, changes=None):
+        if changes is None:
+            # 无法用增量表达的修改直接压缩为新快照
+            await self.compact(collection, records)
+            return
+        if not changes:
+            return
+        
+        content = "".join(self._encode_change(change) for change in changes)
+        journal_file = self.journal_files[collection]
+        with metrics.timer("storage.file.write"):
+            async with aiofiles.open(journal_file, "a", encoding="utf-8") as f:
+                await f.write(content)
+                await self._after_append(journal_file, f)
+        metrics.increment("storage.file.write_bytes", len(content))
+        self.journal_lengths[collection] = self.journal_lengths.get(collection, 0) + len(changes)
+    
+    def needs_compaction(self, collection):
+        return self.journal_lengths.get(collection, 0) >= self.compact_threshold
+    
+    def has_pending_changes(self, collection):
+        return self.journal_lengths.get(collection, 0) > 0
+    
+    async def compact(self, collection, records):
+        # 快照原子替换后再清空日志；除 none 策略外先确保快照落盘，
+        # 避免日志已清空而快照仍停留在页缓存中。两步之间崩溃时日志回放是幂等的
+        durable = self.fsync != "none"
+        await self._write_file(self.data_files[collection], list(records.values()), durable)
+        async with aiofiles.open(self.journal_files[collection], "w", encoding="utf-8") as f:
+            await f.write("")
+        self.journal_lengths[collection] = 0
+
+BACKENDS = {
+    "json": JsonFileBackend,
+    "journal": JournalBackend
+}
+
+def create_backend(name, data_files, **options):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown storage backend: {name}")
+    return BACKENDS[name](data_files, **options)
\ No newline at end of file
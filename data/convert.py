@@ -0,0 +1,35 @@
+# 把集合文件转换为指定的存储格式（json / compact / binary），日志文件保持不变
+# 用法（在包的上级目录执行）：python -m <包名>.data.convert --format binary [--dir 数据目录]
+import asyncio
+import argparse
+from pathlib import Path
+from .backends import JsonFileBackend
+from .formats import FORMATS, detect
+from .storage import collection_files, default_data_dir
+
+async def convert_storage(base_dir=None, fmt="compact"):
+    base_dir = Path(base_dir) if base_dir else default_data_dir()
+    backend = JsonFileBackend(collection_files(base_dir), format=fmt)
+    results = {}
+    for collection, file_path in backend.data_files.items():
+        if not file_path.exists():
+            continue
+        with open(file_path, "rb") as f:
+            source_format = detect(f.read(8))
+        data = await backend._read_file(file_path)
+        await backend._write_file(file_path, data, durable=True)
+        results[collection] = (source_format, file_path.stat().st_size)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert data files to another storage format")
+    parser.add_argument("--format", choices=FORMATS, default="compact")
+    parser.add_argument("--dir", help="directory containing the collection files")
+    args = parser.parse_args()
+    
+    results = asyncio.run(convert_storage(args.dir, args.format))
+    for collection, (source_format, size) in results.items():
+        print(f"{collection}: {source_format} -> {args.format} ({size} bytes)")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,54 @@
+import json
+import pickle
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# 集合文件的编码格式：
+# json 带缩进的 JSON（默认，便于人工查看）；compact 无缩进的紧凑 JSON；
+# binary 二进制编码，安装了 msgpack 时使用 msgpack，否则退回标准库 pickle。
+# 二进制文件以 MAGIC + 版本号 + 编码标识开头，读取时按文件头自动识别，与 JSON 文件可混用
+FORMATS = ("json", "compact", "binary")
+
+MAGIC = b"CRA"
+FORMAT_VERSION = 1
+CODEC_MSGPACK = b"m"
+CODEC_PICKLE = b"p"
+
+def encode(data, fmt="json"):
+    if fmt == "json":
+        return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    if fmt == "compact":
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if fmt == "binary":
+        header = MAGIC + bytes([FORMAT_VERSION])
+        if msgpack is not None:
+            return header + CODEC_MSGPACK + msgpack.packb(data, use_bin_type=True)
+        # 数据文件只由服务端自己写入，pickle 仅作为无 msgpack 时的本地格式
+        return header + CODEC_PICKLE + pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+    raise ValueError(f"Unknown storage format: {fmt}")
+
+def decode(content):
+    if not content.startswith(MAGIC):
+        return json.loads(content.decode("utf-8"))
+    
+    version = content[len(MAGIC)]
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported storage format version: {version}")
+    codec = content[len(MAGIC) + 1:len(MAGIC) + 2]
+    payload = content[len(MAGIC) + 2:]
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("Data file is msgpack-encoded but msgpack is not installed")
+        return msgpack.unpackb(payload, raw=False)
+    if codec == CODEC_PICKLE:
+        return pickle.loads(payload)
+    raise ValueError(f"Unknown storage codec: {codec!r}")
+
+def detect(content):
+    # 返回文件内容对应的格式名
+    if content.startswith(MAGIC):
+        return "binary"
+    return "json"
\ No newline at end of file
@@ -0,0 +1,39 @@
+# 二级索引：字段值 -> {id: 记录}，由 Storage 在写操作时增量维护，用于等值查询
+class FieldIndex:
+    def __init__(self, field):
+        self.field = field
+        self.buckets = {}
+        # id -> 建索引时的字段值；记录被原地修改后仍能从正确的桶中移除
+        self.keys = {}
+    
+    def add(self, item_id, item):
+        value = item.get(self.field)
+        try:
+            bucket = self.buckets.setdefault(value, {})
+        except TypeError:
+            # 不可哈希的值不可能与可哈希的查询值相等，跳过即可
+            return
+        bucket[item_id] = item
+        self.keys[item_id] = value
+    
+    def remove(self, item_id):
+        if item_id not in self.keys:
+            return
+        value = self.keys.pop(item_id)
+        bucket = self.buckets[value]
+        bucket.pop(item_id, None)
+        if not bucket:
+            del self.buckets[value]
+    
+    def rebuild(self, records):
+        self.buckets = {}
+        self.keys = {}
+        for item_id, item in records.items():
+            self.add(item_id, item)
+    
+    def lookup(self, value):
+        try:
+            bucket = self.buckets.get(value)
+        except TypeError:
+            return None
+        return bucket or {}
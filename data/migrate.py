@@ -0,0 +1,38 @@
+# 把 JSON 文件存储（含 journal 日志）中的数据导入 SQLite 数据库
+# 用法（在包的上级目录执行）：python -m <包名>.data.migrate [--source 数据目录] [--db 数据库路径]
+import asyncio
+import argparse
+from pathlib import Path
+from .backends import create_backend
+from .storage import COLLECTIONS, collection_files, default_data_dir
+from .sqlite_storage import SqliteStorage
+
+async def migrate_json_to_sqlite(source_dir=None, db_path=None):
+    source_dir = Path(source_dir) if source_dir else default_data_dir()
+    # journal 后端读取时会回放尚未压缩的日志；没有日志文件时等同于直接读取 JSON 快照
+    source = create_backend("journal", collection_files(source_dir))
+    target = SqliteStorage(source_dir, db_path=db_path)
+    counts = {}
+    try:
+        for collection in COLLECTIONS:
+            if not source.data_files[collection].exists():
+                counts[collection] = 0
+                continue
+            items = await source.load(collection)
+            counts[collection] = await target.import_records(collection, items)
+    finally:
+        await target.close()
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Import data/*.json into a SQLite database")
+    parser.add_argument("--source", help="directory containing the JSON collection files")
+    parser.add_argument("--db", help="path of the SQLite database (default: <source>/league.db)")
+    args = parser.parse_args()
+    
+    counts = asyncio.run(migrate_json_to_sqlite(args.source, args.db))
+    for collection, count in counts.items():
+        print(f"{collection}: {count} records")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,352 @@
+import re
+import json
+import sqlite3
+import asyncio
+import threading
+import contextlib
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from .storage import COLLECTIONS, DEFAULT_INDEXES, default_data_dir
+from ..utils.metrics import metrics
+
+# 可以直接下推为 SQL 等值比较的字段值类型
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+_FIELD_PATTERN = re.compile(r"^\w+$")
+
+def _field_expr(field):
+    return f"json_extract(data, '$.\"{field}\"')"
+
+def _dumps(item):
+    return json.dumps(item, ensure_ascii=False)
+
+class SqliteStorage:
+    # 与 Storage 接口一致的 SQLite 存储：每个集合一张表，记录以 JSON 文本保存，
+    # 声明的二级索引字段建立 json_extract 表达式索引。
+    # WAL 模式下读操作在读线程池中并发执行，写操作在单独的写线程中串行执行，不阻塞事件循环
+    def __init__(self, base_dir=None, db_path=None, indexes=None, read_workers=4, synchronous="NORMAL",
+                 collections=COLLECTIONS):
+        self.base_dir = Path(base_dir) if base_dir else default_data_dir()
+        self.base_dir.mkdir(exist_ok=True)
+        self.db_path = Path(db_path) if db_path else self.base_dir / "league.db"
+        self.indexes = DEFAULT_INDEXES if indexes is None else indexes
+        self.collections = list(collections)
+        self.synchronous = synchronous
+        self._readers = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="sqlite-reader")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._initialize()
+    
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+    
+    def _initialize(self):
+        conn = self._connect()
+        try:
+            for collection in self.collections:
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {collection} ("
+                    "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                    "id TEXT NOT NULL UNIQUE, "
+                    "data TEXT NOT NULL)"
+                )
+                for field in self.indexes.get(collection, []):
+                    conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_{collection}_{field} "
+                        f"ON {collection}({_field_expr(field)})"
+                    )
+        finally:
+            conn.close()
+    
+    def _connection(self):
+        # 每个线程一个连接
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def _run(self, fn, args):
+        return fn(self._connection(), *args)
+    
+    def _run_transaction(self, fn, args):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn, *args)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+    
+    async def _read(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, self._run, fn, args)
+    
+    async def _write(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, self._run_transaction, fn, args)
+    
+    def _table(self, collection):
+        if collection not in self.collections:
+            raise KeyError(collection)
+        return collection
+    
+    def _where(self, fields, value):
+        # 返回 (where 子句, 参数)；无法下推到 SQL 的条件返回 None，由调用方在 Python 中过滤
+        if not isinstance(value, _SCALAR_TYPES):
+            return None
+        if not all(_FIELD_PATTERN.match(field) for field in fields):
+            return None
+        clause = " OR ".join(f"{_field_expr(field)} IS ?" for field in fields)
+        return clause, [value] * len(fields)
+    
+    def _select(self, conn, collection, fields=None, value=None):
+        # 返回 [(seq, 记录)]，按插入顺序排列
+        table = self._table(collection)
+        if fields is None:
+            rows = conn.execute(f"SELECT seq, data FROM {table} ORDER BY seq").fetchall()
+            return [(seq, json.loads(data)) for seq, data in rows]
+        
+        where = self._where(fields, value)
+        if where is None:
+            return [
+                (seq, item) for seq, item in self._select(conn, collection)
+                if any(item.get(field) == value for field in fields)
+            ]
+        clause, params = where
+        rows = conn.execute(f"SELECT seq, data FROM {table} WHERE {clause} ORDER BY seq", params).fetchall()
+        return [(seq, json.loads(data)) for seq, data in rows]
+    
+    # 读操作
+    @metrics.timed("storage.get_all")
+    async def get_all(self, collection):
+        rows = await self._read(self._select, collection)
+        return [item for _, item in rows]
+    
+    @metrics.timed("storage.get_by_id")
+    async def get_by_id(self, collection, item_id):
+        def query(conn):
+            row = conn.execute(f"SELECT data FROM {self._table(collection)} WHERE id = ?", (item_id,)).fetchone()
+            return json.loads(row[0]) if row else None
+        
+        return await self._read(query)
+    
+    @metrics.timed("storage.get_by_field")
+    async def get_by_field(self, collection, field, value):
+        rows = await self._read(self._select, collection, [field], value)
+        return [item for _, item in rows]
+    
+    @metrics.timed("storage.get_by_any_field")
+    async def get_by_any_field(self, collection, fields, value):
+        rows = await self._read(self._select, collection, list(fields), value)
+        return [item for _, item in rows]
+    
+    @metrics.timed("storage.get_page")
+    async def get_page(self, collection, limit, after=None):
+        # id 列上的唯一索引同时提供按 id 的有序扫描；多取一条用于判断是否还有下一页
+        def query(conn):
+            table = self._table(collection)
+            if after is None:
+                rows = conn.execute(f"SELECT id, data FROM {table} ORDER BY id LIMIT ?", (limit + 1,)).fetchall()
+            else:
+                rows = conn.execute(
+                    f"SELECT id, data FROM {table} WHERE id > ? ORDER BY id LIMIT ?",
+                    (after, limit + 1)
+                ).fetchall()
+            next_after = rows[limit - 1][0] if len(rows) > limit else None
+            return [json.loads(data) for _, data in rows[:limit]], next_after
+        
+        return await self._read(query)
+    
+    @metrics.timed("storage.count")
+    async def count(self, collection):
+        def query(conn):
+            return conn.execute(f"SELECT COUNT(*) FROM {self._table(collection)}").fetchone()[0]
+        
+        return await self._read(query)
+    
+    # 写操作，均在写线程的事务中执行
+    def _upsert(self, conn, table, item):
+        conn.execute(
+            f"INSERT INTO {table} (id, data) VALUES (?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET data = excluded.data",
+            (item["id"], _dumps(item))
+        )
+    
+    def _replace(self, conn, table, item_id, updated_item):
+        cursor = conn.execute(
+            f"UPDATE {table} SET id = ?, data = ? WHERE id = ?",
+            (updated_item.get("id", item_id), _dumps(updated_item), item_id)
+        )
+        return cursor.rowcount > 0
+    
+    @metrics.timed("storage.create")
+    async def create(self, collection, item):
+        def insert(conn):
+            self._upsert(conn, self._table(collection), item)
+            return item
+        
+        return await self._write(insert)
+    
+    @metrics.timed("storage.update")
+    async def update(self, collection, item_id, updated_item):
+        def replace(conn):
+            if self._replace(conn, self._table(collection), item_id, updated_item):
+                return updated_item
+            return None
+        
+        return await self._write(replace)
+    
+    @metrics.timed("storage.modify")
+    async def modify(self, collection, item_id, mutator):
+        # 读-改-写在同一个 IMMEDIATE 事务中完成，多进程下同样不会丢失更新
+        results = await self._modify_many(collection, [item_id], mutator)
+        return results[0]
+    
+    @metrics.timed("storage.delete")
+    async def delete(self, collection, item_id):
+        def remove(conn):
+            cursor = conn.execute(f"DELETE FROM {self._table(collection)} WHERE id = ?", (item_id,))
+            return cursor.rowcount > 0
+        
+        return await self._write(remove)
+    
+    @metrics.timed("storage.update_by_field")
+    async def update_by_field(self, collection, field, value, updated_item):
+        def replace_matching(conn):
+            table = self._table(collection)
+            matched = [seq for seq, _ in self._select(conn, collection, [field], value)]
+            if not matched:
+                return False
+            # 与内存存储一致：匹配的记录合并为一条 updated_item，保留第一条的位置
+            conn.executemany(f"DELETE FROM {table} WHERE seq = ?", [(seq,) for seq in matched[1:]])
+            conn.execute(
+                f"UPDATE {table} SET id = ?, data = ? WHERE seq = ?",
+                (updated_item["id"], _dumps(updated_item), matched[0])
+            )
+            return True
+        
+        return await self._write(replace_matching)
+    
+    @metrics.timed("storage.delete_by_field")
+    async def delete_by_field(self, collection, field, value):
+        def remove_matching(conn):
+            table = self._table(collection)
+            matched = [seq for seq, _ in self._select(conn, collection, [field], value)]
+            conn.executemany(f"DELETE FROM {table} WHERE seq = ?", [(seq,) for seq in matched])
+            return bool(matched)
+        
+        return await self._write(remove_matching)
+    
+    @metrics.timed("storage.clear")
+    async def clear(self, collection):
+        def remove_all(conn):
+            conn.execute(f"DELETE FROM {self._table(collection)}")
+        
+        await self._write(remove_all)
+    
+    # 批量操作，每个调用只占用一个事务
+    @metrics.timed("storage.create_many")
+    async def create_many(self, collection, items):
+        def insert_all(conn):
+            table = self._table(collection)
+            for item in items:
+                self._upsert(conn, table, item)
+            return items
+        
+        return await self._write(insert_all)
+    
+    @metrics.timed("storage.update_many")
+    async def update_many(self, collection, updated_items):
+        def replace_all(conn):
+            table = self._table(collection)
+            return [
+                updated_item for item_id, updated_item in updated_items.items()
+                if self._replace(conn, table, item_id, updated_item)
+            ]
+        
+        return await self._write(replace_all)
+    
+    @metrics.timed("storage.modify_many")
+    async def modify_many(self, collection, item_ids, mutator):
+        return await self._modify_many(collection, item_ids, mutator)
+    
+    # modify 与 modify_many 共用的实现，不计时，避免单条修改同时记入两个指标
+    async def _modify_many(self, collection, item_ids, mutator):
+        def read_modify_write_all(conn):
+            table = self._table(collection)
+            results = []
+            for item_id in item_ids:
+                row = conn.execute(f"SELECT data FROM {table} WHERE id = ?", (item_id,)).fetchone()
+                item = json.loads(row[0]) if row else None
+                updated_item = mutator(item) if item is not None else None
+                if updated_item is None:
+                    results.append(item)
+                    continue
+                self._replace(conn, table, item_id, updated_item)
+                results.append(updated_item)
+            return results
+        
+        return await self._write(read_modify_write_all)
+    
+    @metrics.timed("storage.delete_many")
+    async def delete_many(self, collection, item_ids):
+        def remove_all(conn):
+            table = self._table(collection)
+            return sum(
+                conn.execute(f"DELETE FROM {table} WHERE id = ?", (item_id,)).rowcount
+                for item_id in item_ids
+            )
+        
+        return await self._write(remove_all)
+    
+    async def import_records(self, collection, items):
+        # 用 items 整体替换集合内容，供迁移工具使用
+        def replace_all(conn):
+            table = self._table(collection)
+            conn.execute(f"DELETE FROM {table}")
+            for item in items:
+                self._upsert(conn, table, item)
+            return len(items)
+        
+        return await self._write(replace_all)
+    
+    # 与 Storage 保持一致的维护接口
+    def invalidate(self, collection=None):
+        pass
+    
+    @contextlib.asynccontextmanager
+    async def batch(self):
+        # 每次写操作都是独立提交的事务，批处理不改变落盘方式
+        yield
+    
+    async def flush(self, collection=None):
+        # 每次写操作都已提交，无需额外刷新
+        pass
+    
+    async def compact(self, collection=None):
+        def checkpoint(conn):
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._writer, self._run, checkpoint, ())
+    
+    def _shutdown(self):
+        self._readers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+    
+    async def close(self):
+        await asyncio.to_thread(self._shutdown)
\ No newline at end of file
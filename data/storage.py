@@ -1,126 +1,575 @@
-import os
-import json
+import bisect
 import asyncio
-import aiofiles
+import itertools
+import contextlib
+import contextvars
 from pathlib import Path
+from .backends import CHUNK_SIZE, create_backend
+from .indexes import FieldIndex
+from ..utils.rwlock import RWLock
+from ..utils.log import get_logger
+from ..utils.metrics import metrics
+
+COLLECTIONS = [
+    "users",
+    "players",
+    "clubs",
+    "leagues",
+    "league_levels",
+    "national_teams",
+    "matches"
+]
+# 多进程部署时额外需要保存共享登录会话的 sessions 集合，单进程部署不创建
+SHARED_SESSION_COLLECTIONS = COLLECTIONS + ["sessions"]
+
+# 各集合默认声明的二级索引字段，get_by_field 对这些字段走索引
+DEFAULT_INDEXES = {
+    "users": ["username", "role"],
+    "players": ["club", "national_team"],
+    "clubs": ["league", "league_level"],
+    "league_levels": ["league_id"],
+    "matches": ["home_team", "away_team", "status", "match_type"]
+}
+
+logger = get_logger("storage")
+
+def default_data_dir():
+    # 使用项目根目录下的data目录作为默认数据存储位置
+    # 获取当前文件的绝对路径，然后向上两级到项目根目录
+    current_file = Path(__file__).resolve()
+    project_root = current_file.parent.parent.parent
+    return project_root / "data"
+
+def collection_files(base_dir, collections=COLLECTIONS):
+    return {collection: Path(base_dir) / f"{collection}.json" for collection in collections}
+
+async def _run_to_completion(coro):
+    # 落盘一旦开始就执行到底：等待期间调用方被取消时继续等待写入结束（调用方仍持有锁），
+    # 之后再把取消向上传递，内存、待写队列与磁盘不会停在写了一半的状态
+    task = asyncio.ensure_future(coro)
+    cancelled = False
+    while True:
+        try:
+            result = await asyncio.shield(task)
+            break
+        except asyncio.CancelledError:
+            if task.done():
+                raise
+            cancelled = True
+    if cancelled:
+        raise asyncio.CancelledError()
+    return result
 
 class Storage:
-    def __init__(self, base_dir=None):
-        # 使用项目根目录下的data目录作为默认数据存储位置
-        if base_dir:
-            self.base_dir = Path(base_dir)
+    def __init__(self, base_dir=None, backend="json", backend_options=None, indexes=None,
+                 durability="write", flush_interval=0.05, flush_threshold=100, collections=COLLECTIONS):
+        self.base_dir = Path(base_dir) if base_dir else default_data_dir()
+        self.base_dir.mkdir(exist_ok=True)
+        self.data_files = collection_files(self.base_dir, collections)
+        # 每个集合一把读写锁：读操作可并发，写操作独占；等锁耗时记入 storage.<collection>.read_wait / write_wait
+        self.locks = {collection: RWLock(f"storage.{collection}") for collection in collections}
+        # 缓存失效时保证同一集合只被加载一次
+        self._load_locks = {collection: asyncio.Lock() for collection in collections}
+        # 持久化后端：json 每次整表重写，journal 追加变更日志并定期压缩
+        self.backend = create_backend(backend, self.data_files, **(backend_options or {}))
+        # 常驻内存的集合数据（id -> 记录，保持插入顺序），首次读取后由内存提供读服务，写操作同步落盘
+        self._cache = {}
+        # 缓存对应文件的 (mtime, size)，用于发现外部修改并使缓存失效
+        self._signatures = {}
+        # 二级索引：collection -> {field: FieldIndex}
+        self.indexes = DEFAULT_INDEXES if indexes is None else indexes
+        self._field_indexes = {}
+        # 有序主键索引：collection -> 升序排列的 id 列表，用于按 id 游标分页
+        self._ordered_ids = {}
+        # 落盘策略：write 每次写操作立即落盘；batched 先改内存，按间隔或脏写次数成批落盘。
+        # 可传入字符串统一设置，或传入 collection -> 策略 的字典分别设置
+        self.durability = durability
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        # 尚未落盘的变更：collection -> 变更列表（None 表示需要整表重写）
+        self._pending = {}
+        self._dirty_counts = {}
+        self._flush_tasks = {}
+        self._maintenance_tasks = []
+        self._compaction_tasks = set()
+        # close() 开始后不再启动定期维护任务
+        self._closing = False
+        # 当前任务所在批处理中推迟落盘的集合，见 batch()
+        self._batch = contextvars.ContextVar(f"storage_batch_{id(self)}", default=None)
+        self.backend.initialize()
+    
+    async def _load(self, collection):
+        # 调用方需持有该集合的读锁或写锁；文件未被外部修改或仍有未落盘的变更时直接返回缓存
+        self._ensure_maintenance()
+        if self._is_fresh(collection):
+            return self._cache[collection]
+        
+        # 多个读者同时发现缓存失效时只有一个去加载
+        async with self._load_locks[collection]:
+            if self._is_fresh(collection):
+                return self._cache[collection]
+            return await self._reload(collection)
+    
+    def _is_fresh(self, collection):
+        if collection in self._pending:
+            return True
+        return collection in self._cache and self._signatures.get(collection) == self.backend.signature(collection)
+    
+    @metrics.timed("storage.load")
+    async def _reload(self, collection):
+        signature = self.backend.signature(collection)
+        items = await self.backend.load(collection)
+        # 大集合分批建立主键与二级索引，每批之间让出事件循环；期间调用方持有锁，数据不会变化
+        records = {}
+        for start in range(0, len(items), CHUNK_SIZE):
+            if start:
+                await asyncio.sleep(0)
+            for item in items[start:start + CHUNK_SIZE]:
+                records[item["id"]] = item
+        field_indexes = {field: FieldIndex(field) for field in self.indexes.get(collection, [])}
+        if field_indexes:
+            entries = iter(records.items())
+            while True:
+                chunk = list(itertools.islice(entries, CHUNK_SIZE))
+                if not chunk:
+                    break
+                for field_index in field_indexes.values():
+                    for item_id, item in chunk:
+                        field_index.add(item_id, item)
+                await asyncio.sleep(0)
+        ordered_ids = sorted(records)
+        self._cache[collection] = records
+        self._signatures[collection] = signature
+        self._field_indexes[collection] = field_indexes
+        self._ordered_ids[collection] = ordered_ids
+        return records
+    
+    def _index(self, items):
+        # 主键索引：id -> 记录，使按 id 的查询、更新和删除为 O(1)
+        return {item["id"]: item for item in items}
+    
+    def _update_indexes(self, collection, records, changes):
+        self._update_ordered_ids(collection, records, changes)
+        for index in self._field_indexes.get(collection, {}).values():
+            if changes is None:
+                index.rebuild(records)
+                continue
+            for change in changes:
+                if change[0] == "put":
+                    index.remove(change[1]["id"])
+                    index.add(change[1]["id"], change[1])
+                elif change[0] == "delete":
+                    index.remove(change[1])
+                else:
+                    index.rebuild(records)
+    
+    def _update_ordered_ids(self, collection, records, changes):
+        ids = self._ordered_ids.get(collection)
+        if ids is None or changes is None or any(change[0] == "clear" for change in changes):
+            self._ordered_ids[collection] = sorted(records)
+            return
+        for change in changes:
+            item_id = change[1]["id"] if change[0] == "put" else change[1]
+            position = bisect.bisect_left(ids, item_id)
+            exists = position < len(ids) and ids[position] == item_id
+            if change[0] == "put" and not exists:
+                ids.insert(position, item_id)
+            elif change[0] == "delete" and exists:
+                del ids[position]
+    
+    def durability_of(self, collection):
+        if isinstance(self.durability, dict):
+            return self.durability.get(collection, "write")
+        return self.durability
+    
+    async def _save(self, collection, records, changes=None):
+        # 调用方需持有该集合的锁；先更新内存，再按该集合的落盘策略立即或延后写盘
+        self._update_indexes(collection, records, changes)
+        self._cache[collection] = records
+        pending = self._pending.get(collection, [])
+        if pending is None or changes is None:
+            self._pending[collection] = None
         else:
-            # 获取当前文件的绝对路径，然后向上两级到项目根目录
-            current_file = Path(__file__).resolve()
-            project_root = current_file.parent.parent.parent
-            self.base_dir = project_root / "data"
+            self._pending[collection] = pending + changes
+        self._dirty_counts[collection] = self._dirty_counts.get(collection, 0) + 1
         
-        self.base_dir.mkdir(exist_ok=True)
-        self.data_files = {
-            "users": self.base_dir / "users.json",
-            "players": self.base_dir / "players.json",
-            "clubs": self.base_dir / "clubs.json",
-            "leagues": self.base_dir / "leagues.json",
-            "league_levels": self.base_dir / "league_levels.json",
-            "national_teams": self.base_dir / "national_teams.json",
-            "matches": self.base_dir / "matches.json"
-        }
-        self.locks = {
-            "users": asyncio.Lock(),
-            "players": asyncio.Lock(),
-            "clubs": asyncio.Lock(),
-            "leagues": asyncio.Lock(),
-            "league_levels": asyncio.Lock(),
-            "national_teams": asyncio.Lock(),
-            "matches": asyncio.Lock()
-        }
-        self._initialize_data_files()
-    
-    def _initialize_data_files(self):
-        for file_path in self.data_files.values():
-            if not file_path.exists():
-                with open(file_path, "w", encoding="utf-8") as f:
-                    json.dump([], f, ensure_ascii=False, indent=2)
-    
-    async def _read_file(self, file_path):
-        async with aiofiles.open(file_path, "r", encoding="utf-8") as f:
-            content = await f.read()
-            return json.loads(content)
-    
-    async def _write_file(self, file_path, data):
-        async with aiofiles.open(file_path, "w", encoding="utf-8") as f:
-            await f.write(json.dumps(data, ensure_ascii=False, indent=2))
+        if self.durability_of(collection) == "write":
+            batch = self._batch.get()
+            if batch is not None:
+                # 批处理中推迟到批处理结束时统一落盘
+                batch.add(collection)
+                return
+            try:
+                await self._flush_locked(collection)
+            except asyncio.CancelledError:
+                # 取消只会在写入完成后向上传递，缓存与磁盘一致
+                raise
+            except BaseException:
+                # 写入失败时丢弃缓存，下次读取从磁盘重新加载
+                self.invalidate(collection)
+                raise
+        elif self._dirty_counts[collection] >= self.flush_threshold:
+            await self._flush_locked(collection)
+        elif collection not in self._flush_tasks:
+            self._flush_tasks[collection] = asyncio.create_task(self._delayed_flush(collection))
+    
+    async def _flush_locked(self, collection):
+        # 调用方需持有该集合的锁；调用方被取消时写入仍会完成
+        if collection not in self._pending:
+            return
+        await _run_to_completion(self._flush_pending(collection))
+    
+    async def _flush_pending(self, collection):
+        changes = self._pending.pop(collection)
+        dirty_count = self._dirty_counts.pop(collection, 0)
+        records = self._cache[collection]
+        try:
+            with metrics.timer("storage.flush"):
+                await self.backend.save(collection, records, changes)
+        except BaseException:
+            # 失败的变更放回待写队列，由下一次 flush 重试
+            pending = self._pending.get(collection, [])
+            self._pending[collection] = None if changes is None or pending is None else changes + pending
+            self._dirty_counts[collection] = self._dirty_counts.get(collection, 0) + dirty_count
+            raise
+        self._signatures[collection] = self.backend.signature(collection)
+        if self.backend.needs_compaction(collection):
+            task = asyncio.create_task(self.compact(collection))
+            self._compaction_tasks.add(task)
+            task.add_done_callback(self._compaction_tasks.discard)
+    
+    async def _delayed_flush(self, collection):
+        try:
+            await asyncio.sleep(self.flush_interval)
+            async with self.locks[collection].write():
+                self._flush_tasks.pop(collection, None)
+                await self._flush_locked(collection)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Failed to flush collection", extra={"fields": {"collection": collection}})
+            if collection in self._pending:
+                self._flush_tasks[collection] = asyncio.create_task(self._delayed_flush(collection))
+        finally:
+            if self._flush_tasks.get(collection) is asyncio.current_task():
+                del self._flush_tasks[collection]
+    
+    async def flush(self, collection=None):
+        # 立即把尚未落盘的变更写入磁盘
+        collections = [collection] if collection else list(self.data_files)
+        for name in collections:
+            async with self.locks[name].write():
+                await self._flush_locked(name)
+    
+    @contextlib.asynccontextmanager
+    async def batch(self):
+        # 批处理期间 write 策略集合的写操作只更新内存，退出时每个集合落盘一次。
+        # 通过 contextvar 限定在当前任务及其创建的子任务内，不影响其他连接的写操作
+        if self._batch.get() is not None:
+            yield
+            return
+        collections = set()
+        token = self._batch.set(collections)
+        try:
+            yield
+        finally:
+            self._batch.reset(token)
+            await self._flush_batch(collections)
+    
+    async def _flush_batch(self, collections):
+        error = None
+        for collection in collections:
+            async with self.locks[collection].write():
+                try:
+                    await self._flush_locked(collection)
+                except asyncio.CancelledError as e:
+                    # 该集合已写入完成，继续落盘其余集合后再传递取消
+                    error = error or e
+                except BaseException as e:
+                    # 与逐条写入一致：落盘失败时丢弃缓存，下次读取从磁盘重新加载
+                    self.invalidate(collection)
+                    error = error or e
+        if error is not None:
+            raise error
+    
+    def _ensure_maintenance(self):
+        # 首次访问时按后端配置启动定期压缩和定期 fsync 任务
+        if self._maintenance_tasks or self._closing:
+            return
+        if self.backend.compact_interval:
+            self._maintenance_tasks.append(asyncio.create_task(self._compaction_loop()))
+        if self.backend.sync_interval:
+            self._maintenance_tasks.append(asyncio.create_task(self._sync_loop()))
     
+    async def _compaction_loop(self):
+        while True:
+            await asyncio.sleep(self.backend.compact_interval)
+            for collection in self.data_files:
+                try:
+                    await self.compact(collection)
+                except Exception:
+                    logger.exception("Failed to compact collection", extra={"fields": {"collection": collection}})
+    
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(self.backend.sync_interval)
+            try:
+                await self.backend.sync()
+            except Exception:
+                logger.exception("Failed to fsync data files")
+    
+    async def compact(self, collection):
+        async with self.locks[collection].write():
+            if collection not in self._cache:
+                return
+            records = await self._load(collection)
+            await self._flush_locked(collection)
+            if self.backend.has_pending_changes(collection):
+                await _run_to_completion(self._compact_locked(collection, records))
+    
+    async def _compact_locked(self, collection, records):
+        await self.backend.compact(collection, records)
+        self._signatures[collection] = self.backend.signature(collection)
+    
+    async def close(self):
+        # 先置位再取消维护任务，否则下面的 flush / compact 读取集合时会重新启动它们
+        self._closing = True
+        for task in self._maintenance_tasks:
+            task.cancel()
+        self._maintenance_tasks = []
+        for task in list(self._flush_tasks.values()):
+            task.cancel()
+        self._flush_tasks.clear()
+        await self.flush()
+        for task in list(self._compaction_tasks):
+            await task
+        for collection in self.data_files:
+            await self.compact(collection)
+        await self.backend.close()
+    
+    def invalidate(self, collection=None):
+        # 丢弃缓存及尚未落盘的变更
+        if collection is None:
+            self._cache.clear()
+            self._signatures.clear()
+            self._field_indexes.clear()
+            self._ordered_ids.clear()
+            self._pending.clear()
+            self._dirty_counts.clear()
+        else:
+            self._cache.pop(collection, None)
+            self._signatures.pop(collection, None)
+            self._field_indexes.pop(collection, None)
+            self._ordered_ids.pop(collection, None)
+            self._pending.pop(collection, None)
+            self._dirty_counts.pop(collection, None)
+    
+    # 读操作返回的记录与缓存共享，修改后需通过 update 写回
+    @metrics.timed("storage.get_all")
     async def get_all(self, collection):
-        async with self.locks[collection]:
-            data = await self._read_file(self.data_files[collection])
-            return data
+        async with self.locks[collection].read():
+            records = await self._load(collection)
+            return list(records.values())
     
+    @metrics.timed("storage.get_by_id")
     async def get_by_id(self, collection, item_id):
-        async with self.locks[collection]:
-            data = await self._read_file(self.data_files[collection])
-            for item in data:
-                if item["id"] == item_id:
-                    return item
-            return None
+        async with self.locks[collection].read():
+            records = await self._load(collection)
+            return records.get(item_id)
+    
+    @metrics.timed("storage.get_page")
+    async def get_page(self, collection, limit, after=None):
+        # 按 id 升序返回 after 之后的至多 limit 条记录，以及下一页的起点（没有更多记录时为 None）
+        async with self.locks[collection].read():
+            records = await self._load(collection)
+            ids = self._ordered_ids[collection]
+            start = bisect.bisect_right(ids, after) if after is not None else 0
+            page_ids = ids[start:start + limit]
+            next_after = page_ids[-1] if page_ids and start + limit < len(ids) else None
+            return [records[item_id] for item_id in page_ids], next_after
     
+    @metrics.timed("storage.create")
     async def create(self, collection, item):
-        async with self.locks[collection]:
-            data = await self._read_file(self.data_files[collection])
-            data.append(item)
-            await self._write_file(self.data_files[collection], data)
+        async with self.locks[collection].write():
+            records = await self._load(collection)
+            records[item["id"]] = item
+            await self._save(collection, records, [("put", item)])
             return item
     
+    def _replace_record(self, records, item_id, updated_item):
+        # 返回 (新的记录字典, 变更列表)
+        if updated_item.get("id", item_id) == item_id:
+            records[item_id] = updated_item
+            return records, [("put", updated_item)]
+        # 主键变化时按原顺序重建索引
+        records = self._index([
+            updated_item if key == item_id else item
+            for key, item in records.items()
+        ])
+        return records, [("delete", item_id), ("put", updated_item)]
+    
+    @metrics.timed("storage.update")
     async def update(self, collection, item_id, updated_item):
-        async with self.locks[collection]:
-            data = await self._read_file(self.data_files[collection])
-            for i, item in enumerate(data):
-                if item["id"] == item_id:
-                    data[i] = updated_item
-                    await self._write_file(self.data_files[collection], data)
-                    return updated_item
-            return None
+        async with self.locks[collection].write():
+            records = await self._load(collection)
+            if item_id not in records:
+                return None
+            records, changes = self._replace_record(records, item_id, updated_item)
+            await self._save(collection, records, changes)
+            return updated_item
     
+    @metrics.timed("storage.modify")
+    async def modify(self, collection, item_id, mutator):
+        # 在同一把锁内完成读-改-写，避免并发更新相互覆盖；
+        # mutator 接收当前记录并返回新记录，返回 None 表示无需修改
+        results = await self._modify_many(collection, [item_id], mutator)
+        return results[0]
+    
+    @metrics.timed("storage.delete")
     async def delete(self, collection, item_id):
-        async with self.locks[collection]:
-            data = await self._read_file(self.data_files[collection])
-            new_data = [item for item in data if item["id"] != item_id]
-            if len(new_data) < len(data):
-                await self._write_file(self.data_files[collection], new_data)
-                return True
-            return False
+        return await self._delete_many(collection, [item_id]) > 0
     
+    # 批量操作：一次加锁、一次读取、一次落盘
+    @metrics.timed("storage.create_many")
+    async def create_many(self, collection, items):
+        async with self.locks[collection].write():
+            records = await self._load(collection)
+            for item in items:
+                records[item["id"]] = item
+            if items:
+                await self._save(collection, records, [("put", item) for item in items])
+            return items
+    
+    @metrics.timed("storage.update_many")
+    async def update_many(self, collection, updated_items):
+        # updated_items 为 id -> 新记录，返回实际更新的记录
+        async with self.locks[collection].write():
+            records = await self._load(collection)
+            results = []
+            changes = []
+            for item_id, updated_item in updated_items.items():
+                if item_id not in records:
+                    continue
+                records, item_changes = self._replace_record(records, item_id, updated_item)
+                changes.extend(item_changes)
+                results.append(updated_item)
+            if changes:
+                await self._save(collection, records, changes)
+            return results
+    
+    @metrics.timed("storage.modify_many")
+    async def modify_many(self, collection, item_ids, mutator):
+        # 对每条记录执行 mutator，返回与 item_ids 一一对应的结果，不存在的记录为 None
+        return await self._modify_many(collection, item_ids, mutator)
+    
+    # modify / delete 与批量版本共用的实现，不计时，避免单条操作同时记入两个指标
+    async def _modify_many(self, collection, item_ids, mutator):
+        async with self.locks[collection].write():
+            records = await self._load(collection)
+            results = []
+            changes = []
+            for item_id in item_ids:
+                item = records.get(item_id)
+                updated_item = mutator(item) if item is not None else None
+                if updated_item is None:
+                    results.append(item)
+                    continue
+                records, item_changes = self._replace_record(records, item_id, updated_item)
+                changes.extend(item_changes)
+                results.append(updated_item)
+            if changes:
+                await self._save(collection, records, changes)
+            return results
+    
+    @metrics.timed("storage.delete_many")
+    async def delete_many(self, collection, item_ids):
+        # 返回实际删除的记录数
+        return await self._delete_many(collection, item_ids)
+    
+    async def _delete_many(self, collection, item_ids):
+        async with self.locks[collection].write():
+            records = await self._load(collection)
+            deleted_ids = [item_id for item_id in item_ids if records.pop(item_id, None) is not None]
+            if deleted_ids:
+                await self._save(collection, records, [("delete", item_id) for item_id in deleted_ids])
+            return len(deleted_ids)
+    
+    def _find(self, collection, records, field, value):
+        index = self._field_indexes.get(collection, {}).get(field)
+        matched = index.lookup(value) if index else None
+        if matched is None:
+            return {key: item for key, item in records.items() if item.get(field) == value}
+        return matched
+    
+    @metrics.timed("storage.get_by_field")
     async def get_by_field(self, collection, field, value):
-        async with self.locks[collection]:
-            data = await self._read_file(self.data_files[collection])
-            return [item for item in data if item.get(field) == value]
+        async with self.locks[collection].read():
+            records = await self._load(collection)
+            return list(self._find(collection, records, field, value).values())
+    
+    @metrics.timed("storage.get_by_any_field")
+    async def get_by_any_field(self, collection, fields, value):
+        # 任一字段等于 value 的记录，例如按主客队查询比赛
+        async with self.locks[collection].read():
+            records = await self._load(collection)
+            matched = {}
+            for field in fields:
+                matched.update(self._find(collection, records, field, value))
+            return list(matched.values())
     
+    @metrics.timed("storage.update_by_field")
     async def update_by_field(self, collection, field, value, updated_item):
-        async with self.locks[collection]:
-            data = await self._read_file(self.data_files[collection])
-            updated = False
-            for i, item in enumerate(data):
-                if item.get(field) == value:
-                    data[i] = updated_item
-                    updated = True
-            if updated:
-                await self._write_file(self.data_files[collection], data)
-            return updated
+        async with self.locks[collection].write():
+            records = await self._load(collection)
+            matched = self._find(collection, records, field, value)
+            if not matched:
+                return False
+            items = [
+                updated_item if key in matched else item
+                for key, item in records.items()
+            ]
+            await self._save(collection, self._index(items))
+            return True
     
+    @metrics.timed("storage.delete_by_field")
     async def delete_by_field(self, collection, field, value):
-        async with self.locks[collection]:
-            data = await self._read_file(self.data_files[collection])
-            new_data = [item for item in data if item.get(field) != value]
-            if len(new_data) < len(data):
-                await self._write_file(self.data_files[collection], new_data)
+        async with self.locks[collection].write():
+            records = await self._load(collection)
+            deleted_ids = list(self._find(collection, records, field, value))
+            for key in deleted_ids:
+                del records[key]
+            if deleted_ids:
+                await self._save(collection, records, [("delete", key) for key in deleted_ids])
                 return True
             return False
     
+    @metrics.timed("storage.clear")
     async def clear(self, collection):
-        async with self.locks[collection]:
-            await self._write_file(self.data_files[collection], [])
+        async with self.locks[collection].write():
+            await self._save(collection, {}, [("clear",)])
     
+    @metrics.timed("storage.count")
     async def count(self, collection):
-        async with self.locks[collection]:
-            data = await self._read_file(self.data_files[collection])
-            return len(data)
\ No newline at end of file
+        async with self.locks[collection].read():
+            records = await self._load(collection)
+            return len(records)
+
+def create_storage(backend="json", base_dir=None, **options):
+    # 按配置创建存储：json / journal 为内存缓存 + 文件后端，sqlite 为 SQLite 数据库
+    if backend == "sqlite":
+        from .sqlite_storage import SqliteStorage
+        return SqliteStorage(base_dir, **options)
+    return Storage(base_dir, backend=backend, **options)
+
+_default_storage = None
+
+def get_storage():
+    # 进程内共享的 Storage 实例：所有服务共用同一份缓存、索引和每个集合的锁
+    global _default_storage
+    if _default_storage is None:
+        _default_storage = Storage()
+    return _default_storage
+
+def set_storage(storage):
+    global _default_storage
+    _default_storage = storage
\ No newline at end of file
@@ -1,9 +1,202 @@
+import os
+import signal
+import socket
 import asyncio
-from .async_server import AsyncServer
+import argparse
+import multiprocessing
+from .async_server import AsyncServer, MAX_IN_FLIGHT
+from .data.storage import SHARED_SESSION_COLLECTIONS, create_storage
+from .services import AuthService
+from .utils.log import LOG_FORMATS, setup_logging, shutdown_logging
+from .utils.metrics import metrics, dump_periodically, write_snapshot
+from .utils.profiler import profiler
+from .utils.rate_limit import COMMAND_CLASSES, parse_limit
 
-async def main():
-    server = AsyncServer("localhost", 8888)
-    await server.start()
+def parse_args():
+    parser = argparse.ArgumentParser(description="League management server")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--backend", choices=["json", "journal", "sqlite"], default="json",
+                        help="storage backend")
+    parser.add_argument("--data-dir", help="directory for data files")
+    parser.add_argument("--format", choices=["json", "compact", "binary"], default="json",
+                        help="on-disk format for json/journal backends")
+    parser.add_argument("--fsync", choices=["none", "always", "periodic"], default="none",
+                        help="json/journal backends: when to fsync data files")
+    parser.add_argument("--fsync-interval", type=float, default=1.0,
+                        help="seconds between fsyncs with --fsync periodic")
+    parser.add_argument("--durability", choices=["write", "batched"], default="write",
+                        help="json/journal backends: flush on every write, or batch writes in memory")
+    parser.add_argument("--flush-interval", type=float, default=0.05,
+                        help="seconds before batched writes are flushed")
+    parser.add_argument("--flush-threshold", type=int, default=100,
+                        help="number of batched writes that triggers an immediate flush")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    parser.add_argument("--log-format", choices=LOG_FORMATS, default="json")
+    parser.add_argument("--log-file", help="write logs to this file instead of stderr")
+    parser.add_argument("--log-sample-rate", type=float, default=1.0,
+                        help="fraction of successful commands to log (0-1)")
+    parser.add_argument("--log-sample", action="append", default=[], metavar="COMMAND=RATE",
+                        help="per-command sample rate, e.g. PING=0.01; may be repeated")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of server processes sharing the port (requires --backend sqlite; "
+                             "SUBSCRIBE is unavailable)")
+    parser.add_argument("--stats-file", help="periodically write metrics (as returned by STATS) to this file")
+    parser.add_argument("--stats-interval", type=float, default=60.0,
+                        help="seconds between metrics dumps")
+    parser.add_argument("--profile-dir", help="directory for .prof files written by PROFILE (default: system temp dir)")
+    parser.add_argument("--max-connections", type=int, help="maximum concurrent connections per process")
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT,
+                        help="maximum concurrent commands per pipelined connection")
+    parser.add_argument("--max-concurrency", type=int,
+                        help="maximum commands processed at once across all connections per process")
+    parser.add_argument("--command-timeout", type=float,
+                        help="maximum seconds a command may run; requests may also send their own timeout or deadline")
+    parser.add_argument("--rate-limit", action="append", default=[], metavar="CLASS=RATE[/BURST]",
+                        help=f"token-bucket limit per session for a command class ({', '.join(COMMAND_CLASSES)}), "
+                             "e.g. read=100/200; a BATCH costs one token per command and is rejected if that "
+                             "exceeds BURST; may be repeated")
+    return parser.parse_args()
+
+def parse_sample_rates(values):
+    rates = {}
+    for value in values:
+        command, _, rate = value.partition("=")
+        try:
+            rates[command.strip().upper()] = float(rate)
+        except ValueError:
+            raise SystemExit(f"Invalid --log-sample value: {value}")
+    return rates
+
+def parse_rate_limits(values):
+    limits = {}
+    for value in values:
+        try:
+            command_class, limit = parse_limit(value)
+        except ValueError as e:
+            raise SystemExit(f"Invalid --rate-limit value {value}: {e}")
+        limits[command_class] = limit
+    return limits
+
+def build_storage(args):
+    options = {}
+    if args.workers > 1:
+        options["collections"] = SHARED_SESSION_COLLECTIONS
+    if args.backend != "sqlite":
+        options["backend_options"] = {
+            "format": args.format,
+            "fsync": args.fsync,
+            "fsync_interval": args.fsync_interval
+        }
+        options["durability"] = args.durability
+        options["flush_interval"] = args.flush_interval
+        options["flush_threshold"] = args.flush_threshold
+    return create_storage(args.backend, args.data_dir, **options)
+
+async def serve(args, workers=1):
+    profiler.directory = args.profile_dir
+    storage = build_storage(args)
+    server = AsyncServer(
+        args.host, args.port, storage,
+        max_in_flight=args.max_in_flight,
+        reuse_port=workers > 1,
+        shared_sessions=workers > 1,
+        max_connections=args.max_connections,
+        max_concurrency=args.max_concurrency,
+        rate_limits=parse_rate_limits(args.rate_limit),
+        command_timeout=args.command_timeout
+    )
+    stats_task = None
+    stats_file = args.stats_file
+    if stats_file:
+        # 多进程部署时各 worker 写各自的文件，文件名后加进程号
+        if workers > 1:
+            stats_file = f"{stats_file}.{os.getpid()}"
+        stats_task = asyncio.create_task(dump_periodically(stats_file, args.stats_interval))
+    if os.name == "posix":
+        # systemd / docker stop 发送 SIGTERM：与 Ctrl+C 一样取消 serve，由 finally 关闭服务器并刷新存储
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    try:
+        await server.start()
+    finally:
+        await server.stop()
+        if stats_task is not None:
+            stats_task.cancel()
+            write_snapshot(stats_file, metrics.snapshot())
+
+async def prepare_storage(args):
+    # 父进程先建表并创建管理员账号，避免各 worker 启动时竞争
+    storage = build_storage(args)
+    try:
+        await AuthService(storage).init_admin_user()
+    finally:
+        await storage.close()
+
+def run_worker(args):
+    # 父进程以 SIGINT 通知 worker 退出；在后台启动时 SIGINT 可能被继承为忽略，这里恢复默认处理
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    setup_logging(args.log_level, args.log_format, args.log_file, args.log_sample_rate,
+                  parse_sample_rates(args.log_sample))
+    try:
+        asyncio.run(serve(args, args.workers))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    finally:
+        shutdown_logging()
+
+def run_workers(args):
+    # 多个进程各自运行事件循环并监听同一端口；数据与会话都经由 SQLite 共享，
+    # 写操作由 SQLite 的事务串行化，读操作可随进程数扩展
+    asyncio.run(prepare_storage(args))
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_worker, args=(args,), name=f"worker-{i}")
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    
+    def stop_workers(signum, frame):
+        # 父进程收到的停止信号以 SIGINT 转发给各 worker，由它们各自关闭服务器并刷新存储
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGINT)
+    
+    signal.signal(signal.SIGINT, stop_workers)
+    signal.signal(signal.SIGTERM, stop_workers)
+    for process in processes:
+        process.join()
+
+def main():
+    args = parse_args()
+    if args.workers > 1:
+        if args.backend != "sqlite":
+            raise SystemExit("--workers requires --backend sqlite")
+        if not hasattr(socket, "SO_REUSEPORT"):
+            raise SystemExit("--workers requires SO_REUSEPORT support")
+        if args.port == 0:
+            raise SystemExit("--workers requires a fixed --port")
+    if args.stats_interval <= 0:
+        raise SystemExit("--stats-interval must be positive")
+    for option in ("fsync_interval", "flush_interval", "flush_threshold", "max_connections", "max_in_flight", "max_concurrency",
+                   "command_timeout"):
+        value = getattr(args, option)
+        if value is not None and value <= 0:
+            raise SystemExit(f"--{option.replace('_', '-')} must be positive")
+    parse_rate_limits(args.rate_limit)
+    
+    setup_logging(args.log_level, args.log_format, args.log_file, args.log_sample_rate,
+                  parse_sample_rates(args.log_sample))
+    try:
+        if args.workers > 1:
+            run_workers(args)
+        else:
+            try:
+                asyncio.run(serve(args))
+            except (KeyboardInterrupt, asyncio.CancelledError):
+                pass
+    finally:
+        shutdown_logging()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,248 @@
+import zlib
+import json
+import struct
+import asyncio
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# 连接层协议。新连接默认使用 legacy 分帧：一次 read 视为一条 JSON 消息，响应不带分隔符，
+# 与旧客户端保持兼容。客户端可发送 HELLO 协商分帧方式，HELLO 的响应仍按原分帧方式发送，
+# 之后双方改用新的分帧：
+#   ndjson  每条消息为一行 JSON，以 \n 结尾
+#   length  每条消息前带 4 字节大端无符号长度
+# 分帧协议下同一连接的请求并发处理、响应可能乱序，请求中的 request_id 会原样带回响应。
+# length 分帧可同时协商 zlib 压缩，此后每帧正文前带 1 字节标志（0 原文，1 zlib），
+# 不小于 compression_threshold 字节且压缩后更小的消息才会被压缩，双方都可以发送压缩帧。
+# length 分帧还可协商消息编码 codec：json（默认）或 msgpack；服务端未安装 msgpack 时退回 json，
+# 客户端以 HELLO 响应中的 codec 为准。
+# 例：{"command": "HELLO", "data": {"version": 1, "framing": "length", "compression": "zlib", "codec": "msgpack"}}
+PROTOCOL_VERSION = 1
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+LEGACY_READ_SIZE = 4096
+COMPRESSIONS = ("none", "zlib")
+DEFAULT_COMPRESSION_THRESHOLD = 1024
+DEFAULT_COMPRESSION_LEVEL = 6
+# 超过该大小的消息在线程中压缩/解压，zlib 执行期间会释放 GIL
+COMPRESSION_OFFLOAD_SIZE = 256 * 1024
+
+_FLAG_RAW = 0
+_FLAG_ZLIB = 1
+
+_LENGTH = struct.Struct(">I")
+
+class FrameError(Exception):
+    # 分帧出错后流中的位置已不可信，调用方应在回复错误后关闭连接
+    pass
+
+class MessageError(Exception):
+    # 单条消息无法解码，不影响同一连接上的后续消息
+    pass
+
+class LegacyFraming:
+    name = "legacy"
+    # 没有可靠的消息边界，请求按顺序逐条处理
+    pipelined = False
+    
+    def __init__(self, max_frame_size=MAX_FRAME_SIZE):
+        self.max_frame_size = max_frame_size
+    
+    async def read_frame(self, reader):
+        # 连接关闭时返回 None
+        data = await reader.read(LEGACY_READ_SIZE)
+        return data or None
+    
+    async def encode_frame(self, payload):
+        return payload
+
+class NdjsonFraming(LegacyFraming):
+    # 单行长度受 StreamReader 的 limit 约束，服务器以 max_frame_size 创建连接
+    name = "ndjson"
+    pipelined = True
+    
+    async def read_frame(self, reader):
+        while True:
+            try:
+                line = await reader.readuntil(b"\n")
+            except asyncio.IncompleteReadError as e:
+                if e.partial.strip():
+                    raise FrameError("Connection closed in the middle of a frame")
+                return None
+            except asyncio.LimitOverrunError:
+                raise FrameError(f"Frame exceeds the limit of {self.max_frame_size} bytes")
+            # 忽略空行，便于手工调试
+            if line.strip():
+                return line
+    
+    async def encode_frame(self, payload):
+        # json.dumps 默认转义换行，消息体内不会出现裸的 \n
+        return payload + b"\n"
+
+class LengthPrefixedFraming(LegacyFraming):
+    name = "length"
+    pipelined = True
+    
+    def __init__(self, max_frame_size=MAX_FRAME_SIZE, compression="none",
+                 compression_threshold=DEFAULT_COMPRESSION_THRESHOLD,
+                 compression_level=DEFAULT_COMPRESSION_LEVEL):
+        super().__init__(max_frame_size)
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+    
+    async def read_frame(self, reader):
+        try:
+            header = await reader.readexactly(_LENGTH.size)
+        except asyncio.IncompleteReadError as e:
+            if e.partial:
+                raise FrameError("Connection closed in the middle of a frame header")
+            return None
+        
+        (length,) = _LENGTH.unpack(header)
+        if length > self.max_frame_size:
+            raise FrameError(f"Frame of {length} bytes exceeds the limit of {self.max_frame_size} bytes")
+        try:
+            payload = await reader.readexactly(length)
+        except asyncio.IncompleteReadError:
+            raise FrameError("Connection closed in the middle of a frame")
+        if self.compression == "none":
+            return payload
+        
+        if not payload or payload[0] not in (_FLAG_RAW, _FLAG_ZLIB):
+            raise FrameError("Missing or unknown compression flag")
+        if payload[0] == _FLAG_RAW:
+            return payload[1:]
+        if len(payload) > COMPRESSION_OFFLOAD_SIZE:
+            return await asyncio.to_thread(self._decompress, payload)
+        return self._decompress(payload)
+    
+    def _decompress(self, payload):
+        # 解压后的大小同样受 max_frame_size 限制
+        decompressor = zlib.decompressobj()
+        try:
+            content = decompressor.decompress(memoryview(payload)[1:], self.max_frame_size)
+        except zlib.error as e:
+            raise FrameError(f"Invalid compressed frame: {e}")
+        if decompressor.unconsumed_tail:
+            raise FrameError(f"Decompressed frame exceeds the limit of {self.max_frame_size} bytes")
+        return content
+    
+    async def encode_frame(self, payload):
+        if self.compression != "none":
+            if len(payload) > COMPRESSION_OFFLOAD_SIZE:
+                payload = await asyncio.to_thread(self._compress, payload)
+            else:
+                payload = self._compress(payload)
+        return _LENGTH.pack(len(payload)) + payload
+    
+    def _compress(self, payload):
+        # 小消息直接加原文标志，PING 这类消息不付出压缩开销
+        if len(payload) >= self.compression_threshold:
+            compressed = zlib.compress(payload, self.compression_level)
+            if len(compressed) < len(payload):
+                return bytes((_FLAG_ZLIB,)) + compressed
+        return bytes((_FLAG_RAW,)) + payload
+
+FRAMINGS = {
+    "legacy": LegacyFraming,
+    "ndjson": NdjsonFraming,
+    "length": LengthPrefixedFraming
+}
+
+def create_framing(name, max_frame_size=MAX_FRAME_SIZE, **options):
+    if name not in FRAMINGS:
+        raise ValueError(f"Unknown framing: {name}")
+    return FRAMINGS[name](max_frame_size, **options)
+
+def _compression_options(options, framing_name):
+    # 返回压缩相关的分帧参数
+    compression = options.get("compression") or "none"
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression}")
+    if compression == "none":
+        return {}
+    if framing_name != "length":
+        raise ValueError("Compression requires length framing")
+    
+    threshold = options.get("compression_threshold", DEFAULT_COMPRESSION_THRESHOLD)
+    level = options.get("compression_level", DEFAULT_COMPRESSION_LEVEL)
+    if isinstance(threshold, bool) or not isinstance(threshold, int) or threshold < 0:
+        raise ValueError("compression_threshold must be a non-negative integer")
+    if isinstance(level, bool) or not isinstance(level, int) or not -1 <= level <= 9:
+        raise ValueError("compression_level must be an integer between -1 and 9")
+    return {
+        "compression": compression,
+        "compression_threshold": threshold,
+        "compression_level": level
+    }
+
+class JsonCodec:
+    name = "json"
+    label = "JSON"
+    
+    def decode(self, payload):
+        try:
+            return json.loads(payload.decode())
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise MessageError(e)
+    
+    def encode(self, message):
+        return json.dumps(message).encode()
+
+class MsgpackCodec(JsonCodec):
+    name = "msgpack"
+    label = "msgpack"
+    
+    def decode(self, payload):
+        try:
+            return msgpack.unpackb(payload, raw=False)
+        except (ValueError, TypeError, msgpack.UnpackException) as e:
+            raise MessageError(e)
+    
+    def encode(self, message):
+        return msgpack.packb(message, use_bin_type=True)
+
+CODECS = {
+    "json": JsonCodec,
+    "msgpack": MsgpackCodec
+}
+
+def available_codecs():
+    return [name for name in CODECS if name != "msgpack" or msgpack is not None]
+
+def create_codec(name="json"):
+    if name not in CODECS:
+        raise ValueError(f"Unknown codec: {name}")
+    if name == "msgpack" and msgpack is None:
+        # 未安装 msgpack 时退回 JSON
+        name = "json"
+    return CODECS[name]()
+
+def negotiate(options, max_frame_size=MAX_FRAME_SIZE):
+    # 根据 HELLO 的参数返回 (分帧对象, 编码对象, 响应数据)；参数不合法时抛出 ValueError
+    if not isinstance(options, dict):
+        raise ValueError("HELLO data must be an object")
+    version = options.get("version", PROTOCOL_VERSION)
+    if version != PROTOCOL_VERSION:
+        raise ValueError(f"Unsupported protocol version: {version}")
+    framing_name = options.get("framing", "legacy")
+    compression = _compression_options(options, framing_name)
+    codec_name = options.get("codec") or "json"
+    if codec_name != "json" and framing_name != "length":
+        raise ValueError(f"{codec_name} codec requires length framing")
+    framing = create_framing(framing_name, max_frame_size, **compression)
+    codec = create_codec(codec_name)
+    return framing, codec, {
+        "version": PROTOCOL_VERSION,
+        "framing": framing.name,
+        "max_frame_size": max_frame_size,
+        "framings": list(FRAMINGS),
+        "compression": compression.get("compression", "none"),
+        "compression_threshold": compression.get("compression_threshold"),
+        "compression_level": compression.get("compression_level"),
+        "compressions": list(COMPRESSIONS),
+        "codec": codec.name,
+        "codecs": available_codecs()
+    }
\ No newline at end of file
@@ -1,24 +1,42 @@
 import uuid
 import asyncio
 from datetime import datetime, timedelta
-from ..data.storage import Storage
+from ..data.storage import get_storage
 from ..models.user import User
+from ..utils.log import get_logger
+
+logger = get_logger("auth")
 
 class AuthService:
-    def __init__(self):
-        self.storage = Storage()
+    def __init__(self, storage=None, shared_sessions=False):
+        self.storage = storage or get_storage()
         self.active_sessions = {}
         self.session_timeout = timedelta(hours=1)
+        # 多进程部署时会话保存在存储的 sessions 集合中，各进程只做本地缓存：
+        # 本地缓存超过 session_recheck 后重新读取（其他进程的登出、用户修改在此时间内生效），
+        # 最近活跃时间至多每 session_touch_interval 写回一次
+        self.shared_sessions = shared_sessions
+        self.session_recheck = timedelta(seconds=5)
+        self.session_touch_interval = timedelta(minutes=1)
     
     async def login(self, username, password):
-        users = await self.storage.get_all("users")
+        users = await self.storage.get_by_field("users", "username", username)
         for user_data in users:
             if user_data["username"] == username and user_data["password"] == password:
                 user = User.from_dict(user_data)
                 session_id = str(uuid.uuid4())
+                now = datetime.now()
+                if self.shared_sessions:
+                    await self.storage.create("sessions", {
+                        "id": session_id,
+                        "user_id": user.id,
+                        "last_active": now.isoformat()
+                    })
                 self.active_sessions[session_id] = {
                     "user": user,
-                    "last_active": datetime.now()
+                    "last_active": now,
+                    "persisted_active": now,
+                    "checked": now
                 }
                 return {
                     "session_id": session_id,
@@ -27,10 +45,10 @@ class AuthService:
         return None
     
     async def logout(self, session_id):
-        if session_id in self.active_sessions:
-            del self.active_sessions[session_id]
-            return True
-        return False
+        removed = self.active_sessions.pop(session_id, None) is not None
+        if self.shared_sessions and session_id:
+            removed = await self.storage.delete("sessions", session_id) or removed
+        return removed
     
     def get_user_from_session(self, session_id):
         if session_id not in self.active_sessions:
@@ -44,34 +62,79 @@ class AuthService:
         session["last_active"] = datetime.now()
         return session["user"]
     
+    async def resolve_session(self, session_id):
+        # 返回会话对应的用户；共享会话时本地缓存缺失或过旧会从存储中读取
+        if not self.shared_sessions:
+            return self.get_user_from_session(session_id)
+        if not session_id:
+            return None
+        
+        now = datetime.now()
+        session = self.active_sessions.get(session_id)
+        if session is None or now - session["checked"] > self.session_recheck:
+            session = await self._load_session(session_id)
+            if session is None:
+                return None
+        
+        if now - session["last_active"] > self.session_timeout:
+            self.active_sessions.pop(session_id, None)
+            await self.storage.delete("sessions", session_id)
+            return None
+        
+        session["last_active"] = now
+        if now - session["persisted_active"] > self.session_touch_interval:
+            session["persisted_active"] = now
+            
+            def touch(session_data):
+                return dict(session_data, last_active=now.isoformat())
+            
+            await self.storage.modify("sessions", session_id, touch)
+        return session["user"]
+    
+    async def _load_session(self, session_id):
+        cached = self.active_sessions.pop(session_id, None)
+        session_data = await self.storage.get_by_id("sessions", session_id)
+        if not session_data:
+            return None
+        user_data = await self.storage.get_by_id("users", session_data["user_id"])
+        if not user_data:
+            return None
+        
+        persisted_active = datetime.fromisoformat(session_data["last_active"])
+        session = {
+            "user": User.from_dict(user_data),
+            # 本进程内更近的活动时间可能尚未写回
+            "last_active": max(persisted_active, cached["last_active"]) if cached else persisted_active,
+            "persisted_active": persisted_active,
+            "checked": datetime.now()
+        }
+        self.active_sessions[session_id] = session
+        return session
+    
     async def get_user_info(self, session_id):
-        user = self.get_user_from_session(session_id)
+        user = await self.resolve_session(session_id)
         if user:
             return user.to_dict()
         return None
     
     async def create_user(self, username, password, role="user", permissions=None):
-        existing_users = await self.storage.get_all("users")
-        for user_data in existing_users:
-            if user_data["username"] == username:
-                return None
+        existing_users = await self.storage.get_by_field("users", "username", username)
+        if existing_users:
+            return None
         
         user = User(username, password, role, permissions)
         await self.storage.create("users", user.to_dict())
         return user.to_dict()
     
     async def update_user(self, user_id, updates):
-        user_data = await self.storage.get_by_id("users", user_id)
-        if not user_data:
-            return None
-        
-        user = User.from_dict(user_data)
-        for key, value in updates.items():
-            if hasattr(user, key):
-                setattr(user, key, value)
+        def apply_updates(user_data):
+            user = User.from_dict(user_data)
+            for key, value in updates.items():
+                if hasattr(user, key):
+                    setattr(user, key, value)
+            return user.to_dict()
         
-        await self.storage.update("users", user_id, user.to_dict())
-        return user.to_dict()
+        return await self.storage.modify("users", user_id, apply_updates)
     
     async def delete_user(self, user_id):
         return await self.storage.delete("users", user_id)
@@ -93,6 +156,15 @@ class AuthService:
         for session_id in expired_sessions:
             del self.active_sessions[session_id]
         
+        if self.shared_sessions:
+            stored_expired = [
+                session_data["id"] for session_data in await self.storage.get_all("sessions")
+                if now - datetime.fromisoformat(session_data["last_active"]) > self.session_timeout
+                and session_data["id"] not in self.active_sessions
+            ]
+            await self.storage.delete_many("sessions", stored_expired)
+            expired_sessions = set(expired_sessions) | set(stored_expired)
+        
         return len(expired_sessions)
     
     async def init_admin_user(self):
@@ -101,4 +173,4 @@ class AuthService:
             admin_permissions = ["all"]
             admin_user = User("admin", "admin123", "admin", admin_permissions)
             await self.storage.create("users", admin_user.to_dict())
-            print("Admin user created: username=admin, password=admin123")
\ No newline at end of file
+            logger.warning("Admin user created with default password", extra={"fields": {"username": "admin"}})
\ No newline at end of file
@@ -1,14 +1,17 @@
-from ..data.storage import Storage
+from ..data.storage import get_storage
 from ..models.club import Club
 
 class ClubService:
-    def __init__(self):
-        self.storage = Storage()
+    def __init__(self, storage=None):
+        self.storage = storage or get_storage()
     
     async def get_all_clubs(self):
         clubs_data = await self.storage.get_all("clubs")
         return clubs_data
     
+    async def get_clubs_page(self, limit, after=None):
+        return await self.storage.get_page("clubs", limit, after)
+    
     async def get_club_by_id(self, club_id):
         return await self.storage.get_by_id("clubs", club_id)
     
@@ -17,58 +20,78 @@ class ClubService:
         return await self.storage.create("clubs", club.to_dict())
     
     async def update_club(self, club_id, updates):
-        club_data = await self.storage.get_by_id("clubs", club_id)
-        if not club_data:
-            return None
-        
-        club = Club.from_dict(club_data)
-        for key, value in updates.items():
-            if hasattr(club, key):
-                setattr(club, key, value)
+        def apply_updates(club_data):
+            club = Club.from_dict(club_data)
+            for key, value in updates.items():
+                if hasattr(club, key):
+                    setattr(club, key, value)
+            return club.to_dict()
         
-        return await self.storage.update("clubs", club_id, club.to_dict())
+        return await self.storage.modify("clubs", club_id, apply_updates)
     
     async def delete_club(self, club_id):
         return await self.storage.delete("clubs", club_id)
     
+    async def create_clubs(self, clubs_data):
+        clubs = [
+            Club(
+                data.get("name"),
+                data.get("league"),
+                data.get("league_level"),
+                data.get("home_stadium"),
+                data.get("coach")
+            ).to_dict()
+            for data in clubs_data
+        ]
+        return await self.storage.create_many("clubs", clubs)
+    
+    async def update_clubs(self, updates_by_id):
+        # updates_by_id: club_id -> updates，返回更新成功的俱乐部
+        def apply_updates(club_data):
+            club = Club.from_dict(club_data)
+            for key, value in updates_by_id[club_data["id"]].items():
+                if hasattr(club, key):
+                    setattr(club, key, value)
+            return club.to_dict()
+        
+        results = await self.storage.modify_many("clubs", list(updates_by_id), apply_updates)
+        return [club for club in results if club is not None]
+    
+    async def delete_clubs(self, club_ids):
+        return await self.storage.delete_many("clubs", club_ids)
+    
     async def get_clubs_by_league(self, league_id):
-        clubs_data = await self.storage.get_all("clubs")
-        return [club for club in clubs_data if club.get("league") == league_id]
+        return await self.storage.get_by_field("clubs", "league", league_id)
     
     async def get_clubs_by_league_level(self, league_level_id):
-        clubs_data = await self.storage.get_all("clubs")
-        return [club for club in clubs_data if club.get("league_level") == league_level_id]
+        return await self.storage.get_by_field("clubs", "league_level", league_level_id)
     
     async def update_club_stats(self, club_id, stats_updates):
-        club_data = await self.storage.get_by_id("clubs", club_id)
-        if not club_data:
-            return None
-        
-        club = Club.from_dict(club_data)
-        for key, value in stats_updates.items():
-            if key in club.stats:
-                club.stats[key] = value
+        def apply_stats(club_data):
+            club = Club.from_dict(club_data)
+            for key, value in stats_updates.items():
+                if key in club.stats:
+                    club.stats[key] = value
+            return club.to_dict()
         
-        return await self.storage.update("clubs", club_id, club.to_dict())
+        return await self.storage.modify("clubs", club_id, apply_stats)
     
     async def add_player_to_club(self, club_id, player_id):
-        club_data = await self.storage.get_by_id("clubs", club_id)
-        if not club_data:
-            return None
-        
-        club = Club.from_dict(club_data)
-        if player_id not in club.players:
+        def add_player(club_data):
+            club = Club.from_dict(club_data)
+            if player_id in club.players:
+                return None
             club.players.append(player_id)
-            return await self.storage.update("clubs", club_id, club.to_dict())
-        return club_data
+            return club.to_dict()
+        
+        return await self.storage.modify("clubs", club_id, add_player)
     
     async def remove_player_from_club(self, club_id, player_id):
-        club_data = await self.storage.get_by_id("clubs", club_id)
-        if not club_data:
-            return None
-        
-        club = Club.from_dict(club_data)
-        if player_id in club.players:
+        def remove_player(club_data):
+            club = Club.from_dict(club_data)
+            if player_id not in club.players:
+                return None
             club.players.remove(player_id)
-            return await self.storage.update("clubs", club_id, club.to_dict())
-        return club_data
\ No newline at end of file
+            return club.to_dict()
+        
+        return await self.storage.modify("clubs", club_id, remove_player)
\ No newline at end of file
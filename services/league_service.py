@@ -1,15 +1,19 @@
-from ..data.storage import Storage
+from ..data.storage import get_storage
 from ..models.league import League
 from ..models.league_level import LeagueLevel
+from ..utils.pagination import page_items
 
 class LeagueService:
-    def __init__(self):
-        self.storage = Storage()
+    def __init__(self, storage=None):
+        self.storage = storage or get_storage()
     
     async def get_all_leagues(self):
         leagues_data = await self.storage.get_all("leagues")
         return leagues_data
     
+    async def get_leagues_page(self, limit, after=None):
+        return await self.storage.get_page("leagues", limit, after)
+    
     async def get_league_by_id(self, league_id):
         return await self.storage.get_by_id("leagues", league_id)
     
@@ -18,69 +22,66 @@ class LeagueService:
         return await self.storage.create("leagues", league.to_dict())
     
     async def update_league(self, league_id, updates):
-        league_data = await self.storage.get_by_id("leagues", league_id)
-        if not league_data:
-            return None
-        
-        league = League.from_dict(league_data)
-        for key, value in updates.items():
-            if hasattr(league, key):
-                setattr(league, key, value)
+        def apply_updates(league_data):
+            league = League.from_dict(league_data)
+            for key, value in updates.items():
+                if hasattr(league, key):
+                    setattr(league, key, value)
+            return league.to_dict()
         
-        return await self.storage.update("leagues", league_id, league.to_dict())
+        return await self.storage.modify("leagues", league_id, apply_updates)
     
     async def delete_league(self, league_id):
         return await self.storage.delete("leagues", league_id)
     
     async def get_league_levels(self, league_id):
-        league_levels_data = await self.storage.get_all("league_levels")
-        return [level for level in league_levels_data if level.get("league_id") == league_id]
+        return await self.storage.get_by_field("league_levels", "league_id", league_id)
+    
+    async def get_league_levels_page(self, league_id, limit, after=None):
+        # 先经 league_id 索引取出该联赛的级别，再按 id 分页
+        return page_items(await self.get_league_levels(league_id), limit, after)
     
     async def add_league_level(self, league_id, name):
         league_level = LeagueLevel(name, league_id)
         level_data = await self.storage.create("league_levels", league_level.to_dict())
         
-        league_data = await self.storage.get_by_id("leagues", league_id)
-        if league_data:
+        def add_level(league_data):
             league = League.from_dict(league_data)
             league.league_levels.append(level_data["id"])
-            await self.storage.update("leagues", league_id, league.to_dict())
+            return league.to_dict()
         
+        await self.storage.modify("leagues", league_id, add_level)
         return level_data
     
     async def update_league_level(self, level_id, updates):
-        level_data = await self.storage.get_by_id("league_levels", level_id)
-        if not level_data:
-            return None
-        
-        level = LeagueLevel.from_dict(level_data)
-        for key, value in updates.items():
-            if hasattr(level, key):
-                setattr(level, key, value)
+        def apply_updates(level_data):
+            level = LeagueLevel.from_dict(level_data)
+            for key, value in updates.items():
+                if hasattr(level, key):
+                    setattr(level, key, value)
+            return level.to_dict()
         
-        return await self.storage.update("league_levels", level_id, level.to_dict())
+        return await self.storage.modify("league_levels", level_id, apply_updates)
     
     async def delete_league_level(self, level_id):
         level_data = await self.storage.get_by_id("league_levels", level_id)
         if not level_data:
             return False
         
-        league_id = level_data["league_id"]
-        league_data = await self.storage.get_by_id("leagues", league_id)
-        if league_data:
+        def remove_level(league_data):
             league = League.from_dict(league_data)
-            if level_id in league.league_levels:
-                league.league_levels.remove(level_id)
-                await self.storage.update("leagues", league_id, league.to_dict())
+            if level_id not in league.league_levels:
+                return None
+            league.league_levels.remove(level_id)
+            return league.to_dict()
         
+        await self.storage.modify("leagues", level_data["league_id"], remove_level)
         return await self.storage.delete("league_levels", level_id)
     
     async def set_clubs_to_level(self, level_id, club_ids):
-        level_data = await self.storage.get_by_id("league_levels", level_id)
-        if not level_data:
-            return None
-        
-        level = LeagueLevel.from_dict(level_data)
-        level.clubs = club_ids
+        def set_clubs(level_data):
+            level = LeagueLevel.from_dict(level_data)
+            level.clubs = club_ids
+            return level.to_dict()
         
-        return await self.storage.update("league_levels", level_id, level.to_dict())
\ No newline at end of file
+        return await self.storage.modify("league_levels", level_id, set_clubs)
\ No newline at end of file
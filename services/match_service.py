@@ -1,14 +1,28 @@
-from ..data.storage import Storage
+from ..data.storage import get_storage
 from ..models.match import Match
+from ..utils.events import event_bus
 
 class MatchService:
-    def __init__(self):
-        self.storage = Storage()
+    def __init__(self, storage=None):
+        self.storage = storage or get_storage()
+    
+    def _publish(self, event_type, match_data):
+        # 比赛变更后通知订阅了该比赛或相关球队的连接
+        if match_data is not None:
+            event_bus.publish(
+                event_type,
+                match_data,
+                match_id=match_data["id"],
+                teams=(match_data.get("home_team"), match_data.get("away_team"))
+            )
     
     async def get_all_matches(self):
         matches_data = await self.storage.get_all("matches")
         return matches_data
     
+    async def get_matches_page(self, limit, after=None):
+        return await self.storage.get_page("matches", limit, after)
+    
     async def get_match_by_id(self, match_id):
         return await self.storage.get_by_id("matches", match_id)
     
@@ -18,54 +32,77 @@ class MatchService:
         return await self.storage.create("matches", match.to_dict())
     
     async def update_match(self, match_id, updates):
-        match_data = await self.storage.get_by_id("matches", match_id)
-        if not match_data:
-            return None
-        
-        match = Match.from_dict(match_data)
-        for key, value in updates.items():
-            if hasattr(match, key):
-                setattr(match, key, value)
+        def apply_updates(match_data):
+            match = Match.from_dict(match_data)
+            for key, value in updates.items():
+                if hasattr(match, key):
+                    setattr(match, key, value)
+            return match.to_dict()
         
-        return await self.storage.update("matches", match_id, match.to_dict())
+        match_data = await self.storage.modify("matches", match_id, apply_updates)
+        self._publish("match_updated", match_data)
+        return match_data
     
     async def delete_match(self, match_id):
         return await self.storage.delete("matches", match_id)
     
-    async def update_match_score(self, match_id, home_score, away_score):
-        match_data = await self.storage.get_by_id("matches", match_id)
-        if not match_data:
-            return None
+    async def create_matches(self, matches_data):
+        matches = []
+        for data in matches_data:
+            match = Match(data.get("home_team"), data.get("away_team"), data.get("match_time"), data.get("location"))
+            match.match_type = data.get("match_type", "league")
+            matches.append(match.to_dict())
+        return await self.storage.create_many("matches", matches)
+    
+    async def update_matches(self, updates_by_id):
+        # updates_by_id: match_id -> updates，返回更新成功的比赛
+        def apply_updates(match_data):
+            match = Match.from_dict(match_data)
+            for key, value in updates_by_id[match_data["id"]].items():
+                if hasattr(match, key):
+                    setattr(match, key, value)
+            return match.to_dict()
         
-        match = Match.from_dict(match_data)
-        match.score["home"] = home_score
-        match.score["away"] = away_score
-        match.status = "completed"
+        results = await self.storage.modify_many("matches", list(updates_by_id), apply_updates)
+        updated = [match for match in results if match is not None]
+        for match_data in updated:
+            self._publish("match_updated", match_data)
+        return updated
+    
+    async def delete_matches(self, match_ids):
+        return await self.storage.delete_many("matches", match_ids)
+    
+    async def update_match_score(self, match_id, home_score, away_score):
+        def apply_score(match_data):
+            match = Match.from_dict(match_data)
+            match.score["home"] = home_score
+            match.score["away"] = away_score
+            match.status = "completed"
+            return match.to_dict()
         
-        return await self.storage.update("matches", match_id, match.to_dict())
+        match_data = await self.storage.modify("matches", match_id, apply_score)
+        self._publish("score_updated", match_data)
+        return match_data
     
     async def get_matches_by_team(self, team_id):
-        matches_data = await self.storage.get_all("matches")
-        return [match for match in matches_data if match.get("home_team") == team_id or match.get("away_team") == team_id]
+        return await self.storage.get_by_any_field("matches", ["home_team", "away_team"], team_id)
     
     async def get_matches_by_status(self, status):
-        matches_data = await self.storage.get_all("matches")
-        return [match for match in matches_data if match.get("status") == status]
+        return await self.storage.get_by_field("matches", "status", status)
     
     async def get_matches_by_type(self, match_type):
-        matches_data = await self.storage.get_all("matches")
-        return [match for match in matches_data if match.get("match_type") == match_type]
+        return await self.storage.get_by_field("matches", "match_type", match_type)
     
     async def add_goal_scorer(self, match_id, player_id, team, minute):
-        match_data = await self.storage.get_by_id("matches", match_id)
-        if not match_data:
-            return None
-        
-        match = Match.from_dict(match_data)
-        match.goal_scorers.append({
-            "player_id": player_id,
-            "team": team,
-            "minute": minute
-        })
+        def add_scorer(match_data):
+            match = Match.from_dict(match_data)
+            match.goal_scorers.append({
+                "player_id": player_id,
+                "team": team,
+                "minute": minute
+            })
+            return match.to_dict()
         
-        return await self.storage.update("matches", match_id, match.to_dict())
\ No newline at end of file
+        match_data = await self.storage.modify("matches", match_id, add_scorer)
+        self._publish("goal_scored", match_data)
+        return match_data
\ No newline at end of file
@@ -1,14 +1,17 @@
-from ..data.storage import Storage
+from ..data.storage import get_storage
 from ..models.national_team import NationalTeam
 
 class NationalTeamService:
-    def __init__(self):
-        self.storage = Storage()
+    def __init__(self, storage=None):
+        self.storage = storage or get_storage()
     
     async def get_all_national_teams(self):
         national_teams_data = await self.storage.get_all("national_teams")
         return national_teams_data
     
+    async def get_national_teams_page(self, limit, after=None):
+        return await self.storage.get_page("national_teams", limit, after)
+    
     async def get_national_team_by_id(self, team_id):
         return await self.storage.get_by_id("national_teams", team_id)
     
@@ -17,38 +20,34 @@ class NationalTeamService:
         return await self.storage.create("national_teams", national_team.to_dict())
     
     async def update_national_team(self, team_id, updates):
-        team_data = await self.storage.get_by_id("national_teams", team_id)
-        if not team_data:
-            return None
-        
-        team = NationalTeam.from_dict(team_data)
-        for key, value in updates.items():
-            if hasattr(team, key):
-                setattr(team, key, value)
+        def apply_updates(team_data):
+            team = NationalTeam.from_dict(team_data)
+            for key, value in updates.items():
+                if hasattr(team, key):
+                    setattr(team, key, value)
+            return team.to_dict()
         
-        return await self.storage.update("national_teams", team_id, team.to_dict())
+        return await self.storage.modify("national_teams", team_id, apply_updates)
     
     async def delete_national_team(self, team_id):
         return await self.storage.delete("national_teams", team_id)
     
     async def add_player_to_national_team(self, team_id, player_id):
-        team_data = await self.storage.get_by_id("national_teams", team_id)
-        if not team_data:
-            return None
-        
-        team = NationalTeam.from_dict(team_data)
-        if player_id not in team.players:
+        def add_player(team_data):
+            team = NationalTeam.from_dict(team_data)
+            if player_id in team.players:
+                return None
             team.players.append(player_id)
-            return await self.storage.update("national_teams", team_id, team.to_dict())
-        return team_data
+            return team.to_dict()
+        
+        return await self.storage.modify("national_teams", team_id, add_player)
     
     async def remove_player_from_national_team(self, team_id, player_id):
-        team_data = await self.storage.get_by_id("national_teams", team_id)
-        if not team_data:
-            return None
-        
-        team = NationalTeam.from_dict(team_data)
-        if player_id in team.players:
+        def remove_player(team_data):
+            team = NationalTeam.from_dict(team_data)
+            if player_id not in team.players:
+                return None
             team.players.remove(player_id)
-            return await self.storage.update("national_teams", team_id, team.to_dict())
-        return team_data
\ No newline at end of file
+            return team.to_dict()
+        
+        return await self.storage.modify("national_teams", team_id, remove_player)
\ No newline at end of file
@@ -1,14 +1,17 @@
-from ..data.storage import Storage
+from ..data.storage import get_storage
 from ..models.player import Player
 
 class PlayerService:
-    def __init__(self):
-        self.storage = Storage()
+    def __init__(self, storage=None):
+        self.storage = storage or get_storage()
     
     async def get_all_players(self):
         players_data = await self.storage.get_all("players")
         return players_data
     
+    async def get_players_page(self, limit, after=None):
+        return await self.storage.get_page("players", limit, after)
+    
     async def get_player_by_id(self, player_id):
         return await self.storage.get_by_id("players", player_id)
     
@@ -17,36 +20,59 @@ class PlayerService:
         return await self.storage.create("players", player.to_dict())
     
     async def update_player(self, player_id, updates):
-        player_data = await self.storage.get_by_id("players", player_id)
-        if not player_data:
-            return None
-        
-        player = Player.from_dict(player_data)
-        for key, value in updates.items():
-            if hasattr(player, key):
-                setattr(player, key, value)
+        def apply_updates(player_data):
+            player = Player.from_dict(player_data)
+            for key, value in updates.items():
+                if hasattr(player, key):
+                    setattr(player, key, value)
+            return player.to_dict()
         
-        return await self.storage.update("players", player_id, player.to_dict())
+        return await self.storage.modify("players", player_id, apply_updates)
     
     async def delete_player(self, player_id):
         return await self.storage.delete("players", player_id)
     
+    async def create_players(self, players_data):
+        players = [
+            Player(
+                data.get("name"),
+                data.get("position"),
+                data.get("qq"),
+                data.get("game_id"),
+                data.get("club"),
+                data.get("national_team")
+            ).to_dict()
+            for data in players_data
+        ]
+        return await self.storage.create_many("players", players)
+    
+    async def update_players(self, updates_by_id):
+        # updates_by_id: player_id -> updates，返回更新成功的球员
+        def apply_updates(player_data):
+            player = Player.from_dict(player_data)
+            for key, value in updates_by_id[player_data["id"]].items():
+                if hasattr(player, key):
+                    setattr(player, key, value)
+            return player.to_dict()
+        
+        results = await self.storage.modify_many("players", list(updates_by_id), apply_updates)
+        return [player for player in results if player is not None]
+    
+    async def delete_players(self, player_ids):
+        return await self.storage.delete_many("players", player_ids)
+    
     async def get_players_by_club(self, club_id):
-        players_data = await self.storage.get_all("players")
-        return [player for player in players_data if player.get("club") == club_id]
+        return await self.storage.get_by_field("players", "club", club_id)
     
     async def get_players_by_national_team(self, national_team_id):
-        players_data = await self.storage.get_all("players")
-        return [player for player in players_data if player.get("national_team") == national_team_id]
+        return await self.storage.get_by_field("players", "national_team", national_team_id)
     
     async def update_player_stats(self, player_id, stats_updates):
-        player_data = await self.storage.get_by_id("players", player_id)
-        if not player_data:
-            return None
-        
-        player = Player.from_dict(player_data)
-        for key, value in stats_updates.items():
-            if key in player.stats:
-                player.stats[key] += value
+        def apply_stats(player_data):
+            player = Player.from_dict(player_data)
+            for key, value in stats_updates.items():
+                if key in player.stats:
+                    player.stats[key] += value
+            return player.to_dict()
         
-        return await self.storage.update("players", player_id, player.to_dict())
\ No newline at end of file
+        return await self.storage.modify("players", player_id, apply_stats)
\ No newline at end of file
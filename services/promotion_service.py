@@ -1,9 +1,10 @@
-from ..data.storage import Storage
+from ..data.storage import get_storage
 from ..models.club import Club
+from ..utils.events import event_bus
 
 class PromotionService:
-    def __init__(self):
-        self.storage = Storage()
+    def __init__(self, storage=None):
+        self.storage = storage or get_storage()
     
     async def execute_promotion_relegation(self, league_id):
         league_data = await self.storage.get_by_id("leagues", league_id)
@@ -14,8 +15,7 @@ class PromotionService:
         promote_count = promotion_relegation_rules["promote"]
         relegate_count = promotion_relegation_rules["relegate"]
         
-        league_levels_data = await self.storage.get_all("league_levels")
-        league_levels = [level for level in league_levels_data if level.get("league_id") == league_id]
+        league_levels = await self.storage.get_by_field("league_levels", "league_id", league_id)
         
         # Sort levels by name (assuming lower numbers are higher levels, e.g., "Level 1" > "Level 2")
         league_levels.sort(key=lambda x: x.get("name"))
@@ -27,11 +27,20 @@ class PromotionService:
             "promoted": [],
             "relegated": []
         }
+        moved_club_ids = []
+        # 升降级按级别依次进行，前面级别升上来的球队会参与后续级别的排名；
+        # 这一过程先在内存中推演（club_id -> 当前级别），最后一次性写入，
+        # 执行中途超时或被取消时不会留下只完成了一部分的升降级
+        clubs = {}
+        club_levels = {}
+        for level in league_levels:
+            for club_data in await self.storage.get_by_field("clubs", "league_level", level["id"]):
+                clubs[club_data["id"]] = club_data
+                club_levels[club_data["id"]] = level["id"]
         
         # Process each level except the highest one for relegation
         for i, level in enumerate(league_levels):
-            clubs_data = await self.storage.get_all("clubs")
-            clubs_in_level = [club for club in clubs_data if club.get("league_level") == level["id"]]
+            clubs_in_level = [clubs[club_id] for club_id, level_id in club_levels.items() if level_id == level["id"]]
             
             # Sort clubs by points (descending), then goal difference (descending), then goals for (descending)
             clubs_in_level.sort(
@@ -50,13 +59,13 @@ class PromotionService:
                 
                 for club_data in promote_clubs:
                     club = Club.from_dict(club_data)
-                    club.league_level = next_level["id"]
-                    await self.storage.update("clubs", club.id, club.to_dict())
+                    club_levels[club.id] = next_level["id"]
                     results["promoted"].append({
                         "club": club.name,
                         "from_level": level["name"],
                         "to_level": next_level["name"]
                     })
+                    moved_club_ids.append(club.id)
             
             # Relegation: clubs from higher levels move down to lower levels
             if i > 0:
@@ -65,19 +74,35 @@ class PromotionService:
                 
                 for club_data in relegate_clubs:
                     club = Club.from_dict(club_data)
-                    club.league_level = prev_level["id"]
-                    await self.storage.update("clubs", club.id, club.to_dict())
+                    club_levels[club.id] = prev_level["id"]
                     results["relegated"].append({
                         "club": club.name,
                         "from_level": level["name"],
                         "to_level": prev_level["name"]
                     })
+                    moved_club_ids.append(club.id)
         
+        await self._move_clubs({club_id: club_levels[club_id] for club_id in moved_club_ids})
+        event_bus.publish(
+            "promotion_relegation",
+            dict(results, league_id=league_id),
+            teams=moved_club_ids,
+            league_levels=[level["id"] for level in league_levels]
+        )
         return results
     
+    async def _move_clubs(self, moves):
+        # moves 为 club_id -> 最终级别 id，在一次写操作中完成
+        def set_level(club_data):
+            club = Club.from_dict(club_data)
+            club.league_level = moves[club.id]
+            return club.to_dict()
+        
+        if moves:
+            await self.storage.modify_many("clubs", list(moves), set_level)
+    
     async def calculate_club_rankings(self, league_level_id):
-        clubs_data = await self.storage.get_all("clubs")
-        clubs_in_level = [club for club in clubs_data if club.get("league_level") == league_level_id]
+        clubs_in_level = await self.storage.get_by_field("clubs", "league_level", league_level_id)
         
         # Sort clubs by points (descending), then goal difference (descending), then goals for (descending)
         clubs_in_level.sort(
@@ -101,10 +126,16 @@ class PromotionService:
             })
         
         # Update league level rankings
-        level_data = await self.storage.get_by_id("league_levels", league_level_id)
-        if level_data:
-            level_data["rankings"] = rankings
-            await self.storage.update("league_levels", league_level_id, level_data)
+        def set_rankings(level_data):
+            return dict(level_data, rankings=rankings)
+        
+        await self.storage.modify("league_levels", league_level_id, set_rankings)
+        event_bus.publish(
+            "table_updated",
+            {"league_level_id": league_level_id, "rankings": rankings},
+            teams=[ranking["club_id"] for ranking in rankings],
+            league_levels=[league_level_id]
+        )
         
         return rankings
     
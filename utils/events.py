@@ -0,0 +1,97 @@
+import uuid
+import asyncio
+from .log import get_logger
+
+# 进程内事件总线：服务在数据变更后发布事件，订阅者各有一个有界队列。
+# 发布不会等待订阅者，队列满的订阅者被视为慢消费者直接断开，其余订阅者不受影响。
+# 事件字段：type、match_id、teams（相关球队/俱乐部 id）、league_levels（相关联赛级别 id）、data
+DEFAULT_QUEUE_SIZE = 100
+FILTER_KEYS = ("match_id", "team", "league_level", "types")
+
+logger = get_logger("events")
+
+class Subscription:
+    def __init__(self, bus, filters, queue_size):
+        self.id = str(uuid.uuid4())
+        self.bus = bus
+        self.filters = filters
+        self.queue = asyncio.Queue(queue_size)
+        self.closed = False
+        self.close_reason = None
+    
+    def matches(self, event):
+        filters = self.filters
+        if "types" in filters and event["type"] not in filters["types"]:
+            return False
+        if "match_id" in filters and event.get("match_id") != filters["match_id"]:
+            return False
+        if "team" in filters and filters["team"] not in event.get("teams", ()):
+            return False
+        if "league_level" in filters and filters["league_level"] not in event.get("league_levels", ()):
+            return False
+        return True
+    
+    def offer(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning("Dropping slow subscriber", extra={"fields": {"subscription_id": self.id}})
+            self.close("slow consumer")
+    
+    def close(self, reason="unsubscribed"):
+        # 清空未投递的事件并放入 None，唤醒等待中的消费者
+        if self.closed:
+            return
+        self.closed = True
+        self.close_reason = reason
+        self.bus.unsubscribe(self)
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+    
+    async def get(self):
+        # 返回下一条事件，订阅关闭后返回 None
+        return await self.queue.get()
+
+class EventBus:
+    def __init__(self):
+        self.subscriptions = {}
+    
+    def subscribe(self, filters=None, queue_size=DEFAULT_QUEUE_SIZE):
+        subscription = Subscription(self, dict(filters or {}), queue_size)
+        self.subscriptions[subscription.id] = subscription
+        return subscription
+    
+    def unsubscribe(self, subscription):
+        self.subscriptions.pop(subscription.id, None)
+    
+    def publish(self, event_type, data, match_id=None, teams=(), league_levels=()):
+        if not self.subscriptions:
+            return
+        event = {
+            "type": event_type,
+            "match_id": match_id,
+            "teams": [team for team in teams if team],
+            "league_levels": [level for level in league_levels if level],
+            "data": data
+        }
+        for subscription in list(self.subscriptions.values()):
+            if subscription.matches(event):
+                subscription.offer(event)
+
+def parse_filters(data):
+    # 校验 SUBSCRIBE 的过滤条件；不合法时抛出 ValueError
+    filters = {}
+    for key in FILTER_KEYS:
+        value = data.get(key)
+        if value is None:
+            continue
+        if key == "types":
+            if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                raise ValueError("types must be a list of event types")
+        elif not isinstance(value, str):
+            raise ValueError(f"{key} must be a string")
+        filters[key] = value
+    return filters
+
+event_bus = EventBus()
\ No newline at end of file
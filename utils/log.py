@@ -0,0 +1,105 @@
+import sys
+import json
+import time
+import queue
+import random
+import logging
+import logging.handlers
+
+# 结构化日志：业务代码通过 get_logger 获取 logger，结构化字段放在 extra={"fields": {...}} 中。
+# 记录在调用方只做入队，格式化和写出由 QueueListener 的后台线程完成，事件循环不会阻塞在 I/O 上。
+# 每条命令一条的请求日志可按命令设置采样率，错误日志不采样
+LOGGER_NAME = "cra"
+LOG_FORMATS = ("json", "text")
+
+_listener = None
+
+class JsonFormatter(logging.Formatter):
+    # 每条记录输出一行 JSON
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+    
+    def formatTime(self, record, datefmt=None):
+        created = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+        return f"{created}.{int(record.msecs):03d}"
+
+class TextFormatter(logging.Formatter):
+    # 便于本地查看：时间 级别 logger 消息 key=value ...
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s %(message)s")
+    
+    def format(self, record):
+        text = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            text += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return text
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # 调用方线程只合并消息参数、展开异常栈，其余格式化工作留给后台线程
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class Sampler:
+    # 按命令名采样，rates 为 命令 -> 采样率（0~1），未配置的命令使用 default_rate
+    def __init__(self, default_rate=1.0, rates=None):
+        self.default_rate = default_rate
+        self.rates = dict(rates or {})
+    
+    def rate(self, command):
+        return self.rates.get(command, self.default_rate)
+    
+    def should_log(self, command):
+        rate = self.rate(command)
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+sampler = Sampler()
+
+def get_logger(name):
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+def setup_logging(level="INFO", fmt="json", filename=None, sample_rate=1.0, sample_rates=None):
+    global _listener
+    if fmt not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format: {fmt}")
+    shutdown_logging()
+    
+    if filename:
+        handler = logging.FileHandler(filename, encoding="utf-8")
+    else:
+        handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.handlers = [_QueueHandler(log_queue)]
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.propagate = False
+    _listener = logging.handlers.QueueListener(log_queue, handler)
+    _listener.start()
+    
+    sampler.default_rate = sample_rate
+    sampler.rates = dict(sample_rates or {})
+
+def shutdown_logging():
+    # 停止后台线程并写出队列中剩余的记录
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
\ No newline at end of file
@@ -0,0 +1,114 @@
+import os
+import json
+import math
+import time
+import asyncio
+import functools
+from contextlib import contextmanager
+
+# 耗时直方图按对数分桶：从 1 微秒起每翻一倍分 4 个桶，分位数的相对误差约 19%，
+# 记录一次耗时只是一次 log2 与一次字典累加
+_MIN_SECONDS = 1e-6
+_BUCKETS_PER_DOUBLING = 4
+PERCENTILES = (50, 95, 99)
+
+def _bucket(seconds):
+    if seconds <= _MIN_SECONDS:
+        return 0
+    return int(math.log2(seconds / _MIN_SECONDS) * _BUCKETS_PER_DOUBLING) + 1
+
+def _bucket_upper(index):
+    return _MIN_SECONDS * 2 ** (index / _BUCKETS_PER_DOUBLING)
+
+class Metrics:
+    # 进程内的轻量指标：计数器与耗时汇总（次数 / 总耗时 / 最大值 / 直方图）
+    def __init__(self):
+        self.counters = {}
+        self.timings = {}
+        self.started_at = time.time()
+    
+    def increment(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+    
+    def observe(self, name, seconds):
+        timing = self.timings.get(name)
+        if timing is None:
+            timing = self.timings[name] = {"count": 0, "total": 0.0, "max": 0.0, "buckets": {}}
+        timing["count"] += 1
+        timing["total"] += seconds
+        if seconds > timing["max"]:
+            timing["max"] = seconds
+        buckets = timing["buckets"]
+        index = _bucket(seconds)
+        buckets[index] = buckets.get(index, 0) + 1
+    
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+    
+    def timed(self, name):
+        # 协程函数的装饰器，按 name 记录每次调用的耗时
+        def decorator(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+    
+    def _summary(self, timing):
+        # 分位数取所在桶的上界，不超过实际最大值
+        count = timing["count"]
+        summary = {
+            "count": count,
+            "total": timing["total"],
+            "mean": timing["total"] / count if count else 0.0,
+            "max": timing["max"]
+        }
+        buckets = sorted(timing["buckets"].items())
+        for percentile in PERCENTILES:
+            target = count * percentile / 100
+            seen = 0
+            value = timing["max"]
+            for index, bucket_count in buckets:
+                seen += bucket_count
+                if seen >= target:
+                    value = min(_bucket_upper(index), timing["max"])
+                    break
+            summary[f"p{percentile}"] = value
+        return summary
+    
+    def snapshot(self):
+        return {
+            "pid": os.getpid(),
+            "uptime": time.time() - self.started_at,
+            "counters": dict(self.counters),
+            "timings": {name: self._summary(timing) for name, timing in sorted(self.timings.items())}
+        }
+    
+    def reset(self):
+        self.counters.clear()
+        self.timings.clear()
+        self.started_at = time.time()
+
+metrics = Metrics()
+
+def write_snapshot(path, snapshot):
+    # 先写临时文件再替换，读取方不会看到写了一半的文件
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+async def dump_periodically(path, interval):
+    # 每隔 interval 秒把当前指标写入 path；多进程部署时各进程写各自的文件
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(write_snapshot, path, metrics.snapshot())
\ No newline at end of file
@@ -0,0 +1,48 @@
+import json
+import bisect
+import base64
+import binascii
+
+# 列表命令的分页参数：limit 为每页条数，cursor 为上一页返回的 next_cursor。
+# 游标是上一页最后一条记录 id 的 base64 编码，客户端应将其视为不透明的字符串
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def encode_cursor(last_id):
+    if last_id is None:
+        return None
+    raw = json.dumps({"after": last_id}, ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor):
+    # 返回游标对应的 after id；cursor 为空时从头开始
+    if cursor is None:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii"))
+        after = json.loads(raw.decode("utf-8"))["after"]
+    except (AttributeError, UnicodeError, binascii.Error, ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(after, str):
+        raise ValueError("Invalid cursor")
+    return after
+
+def parse_page(data):
+    # 返回 (limit, after)；未传 limit 时返回 None，表示不分页
+    limit = data.get("limit")
+    if limit is None:
+        if data.get("cursor") is None:
+            return None
+        limit = DEFAULT_PAGE_SIZE
+    if isinstance(limit, bool) or not isinstance(limit, int) or limit <= 0:
+        raise ValueError("Invalid limit: must be a positive integer")
+    return min(limit, MAX_PAGE_SIZE), decode_cursor(data.get("cursor"))
+
+def page_items(items, limit, after=None):
+    # 在已取出的记录列表上按 id 升序分页，返回值与 Storage.get_page 相同：(本页记录, 下一页的起点)
+    items = sorted(items, key=lambda item: item["id"])
+    ids = [item["id"] for item in items]
+    start = bisect.bisect_right(ids, after) if after is not None else 0
+    page = items[start:start + limit]
+    next_after = page[-1]["id"] if page and start + limit < len(items) else None
+    return page, next_after
\ No newline at end of file
@@ -9,6 +9,54 @@ class Permissions:
         "get_matches"
     ]
     
+    # 命令 -> 所需权限
+    ACTION_MAP = {
+        "GET_PLAYERS": "get_players",
+        "GET_PLAYER": "get_players",
+        "ADD_PLAYER": "add_player",
+        "UPDATE_PLAYER": "update_player",
+        "DELETE_PLAYER": "delete_player",
+        "ADD_PLAYERS": "add_player",
+        "UPDATE_PLAYERS": "update_player",
+        "DELETE_PLAYERS": "delete_player",
+        "GET_CLUBS": "get_clubs",
+        "GET_CLUB": "get_clubs",
+        "ADD_CLUB": "add_club",
+        "UPDATE_CLUB": "update_club",
+        "DELETE_CLUB": "delete_club",
+        "ADD_CLUBS": "add_club",
+        "UPDATE_CLUBS": "update_club",
+        "DELETE_CLUBS": "delete_club",
+        "GET_LEAGUES": "get_leagues",
+        "GET_LEAGUE": "get_leagues",
+        "ADD_LEAGUE": "add_league",
+        "UPDATE_LEAGUE": "update_league",
+        "DELETE_LEAGUE": "delete_league",
+        "GET_LEAGUE_LEVELS": "get_league_levels",
+        "ADD_LEAGUE_LEVEL": "add_league_level",
+        "UPDATE_LEAGUE_LEVEL": "update_league_level",
+        "DELETE_LEAGUE_LEVEL": "delete_league_level",
+        "SET_CLUBS_TO_LEVEL": "set_clubs_to_level",
+        "GET_NATIONAL_TEAMS": "get_national_teams",
+        "GET_NATIONAL_TEAM": "get_national_teams",
+        "ADD_NATIONAL_TEAM": "add_national_team",
+        "UPDATE_NATIONAL_TEAM": "update_national_team",
+        "DELETE_NATIONAL_TEAM": "delete_national_team",
+        "GET_MATCHES": "get_matches",
+        "GET_MATCH": "get_matches",
+        "ADD_MATCH": "add_match",
+        "UPDATE_MATCH": "update_match",
+        "DELETE_MATCH": "delete_match",
+        "ADD_MATCHES": "add_match",
+        "UPDATE_MATCHES": "update_match",
+        "DELETE_MATCHES": "delete_match",
+        "EXECUTE_PROMOTION_RELEGATION": "execute_promotion_relegation",
+        "SUBSCRIBE": "get_matches",
+        "UNSUBSCRIBE": "get_matches",
+        "STATS": "view_stats",
+        "PROFILE": "profile_server"
+    }
+    
     @staticmethod
     def has_permission(user, permission):
         if not user:
@@ -21,42 +69,13 @@ class Permissions:
     
     @staticmethod
     def can_perform_action(user, action):
-        action_map = {
-            "GET_PLAYERS": "get_players",
-            "GET_PLAYER": "get_players",
-            "ADD_PLAYER": "add_player",
-            "UPDATE_PLAYER": "update_player",
-            "DELETE_PLAYER": "delete_player",
-            "GET_CLUBS": "get_clubs",
-            "GET_CLUB": "get_clubs",
-            "ADD_CLUB": "add_club",
-            "UPDATE_CLUB": "update_club",
-            "DELETE_CLUB": "delete_club",
-            "GET_LEAGUES": "get_leagues",
-            "GET_LEAGUE": "get_leagues",
-            "ADD_LEAGUE": "add_league",
-            "UPDATE_LEAGUE": "update_league",
-            "DELETE_LEAGUE": "delete_league",
-            "GET_LEAGUE_LEVELS": "get_league_levels",
-            "ADD_LEAGUE_LEVEL": "add_league_level",
-            "UPDATE_LEAGUE_LEVEL": "update_league_level",
-            "DELETE_LEAGUE_LEVEL": "delete_league_level",
-            "SET_CLUBS_TO_LEVEL": "set_clubs_to_level",
-            "GET_NATIONAL_TEAMS": "get_national_teams",
-            "GET_NATIONAL_TEAM": "get_national_teams",
-            "ADD_NATIONAL_TEAM": "add_national_team",
-            "UPDATE_NATIONAL_TEAM": "update_national_team",
-            "DELETE_NATIONAL_TEAM": "delete_national_team",
-            "GET_MATCHES": "get_matches",
-            "GET_MATCH": "get_matches",
-            "ADD_MATCH": "add_match",
-            "UPDATE_MATCH": "update_match",
-            "DELETE_MATCH": "delete_match",
-            "EXECUTE_PROMOTION_RELEGATION": "execute_promotion_relegation"
-        }
-        
-        permission = action_map.get(action)
+        permission = Permissions.ACTION_MAP.get(action)
         if not permission:
             return False
         
-        return Permissions.has_permission(user, permission)
\ No newline at end of file
+        return Permissions.has_permission(user, permission)
+    
+    @staticmethod
+    def is_read_only(action):
+        # 只需要普通用户权限的命令不修改数据
+        return Permissions.ACTION_MAP.get(action) in Permissions.USER_PERMISSIONS
\ No newline at end of file
@@ -0,0 +1,157 @@
+import os
+import time
+import asyncio
+import cProfile
+import tempfile
+from pathlib import Path
+from .log import get_logger
+
+# 运行中按需开启的 cProfile 采集，由 PROFILE 命令控制，结果写成 .prof 文件，
+# 可用 python -m pstats 或 snakeviz 查看。同一进程同一时间只有一个采集会话。
+# 不限定命令时采集整个事件循环线程；限定命令时只在该命令执行期间开启，
+# 但命令 await 期间同一线程上运行的其他任务也会被计入
+MAX_DURATION = 600
+
+logger = get_logger("profiler")
+
+class ProfileSession:
+    def __init__(self, path, duration, requests, command):
+        self.profile = cProfile.Profile()
+        self.path = path
+        self.duration = duration
+        self.requests = requests
+        self.command = command
+        self.started_at = time.time()
+        self.handled = 0
+        # 限定命令时正在执行的匹配命令数，从 0 变为 1 时开启采集，回到 0 时暂停
+        self.running = 0
+        self.timer = None
+    
+    def enter(self):
+        if self.running == 0:
+            self.profile.enable()
+        self.running += 1
+    
+    def exit(self):
+        self.running -= 1
+        if self.running == 0:
+            self.profile.disable()
+    
+    def info(self):
+        return {
+            "path": str(self.path),
+            "duration": self.duration,
+            "requests": self.requests,
+            "command": self.command,
+            "handled": self.handled,
+            "elapsed": time.time() - self.started_at
+        }
+
+def _positive(value, name):
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise ValueError(f"{name} must be a positive number")
+    return value
+
+class Profiler:
+    def __init__(self, directory=None):
+        # .prof 文件的输出目录，默认为系统临时目录
+        self.directory = directory
+        self.session = None
+        # 自动结束的会话在后台写文件
+        self._writes = set()
+    
+    def _path(self, filename):
+        directory = Path(self.directory or tempfile.gettempdir())
+        if filename is None:
+            filename = f"profile-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.prof"
+        # 只接受文件名，不允许客户端把文件写到输出目录之外
+        if not isinstance(filename, str) or Path(filename).name != filename or not filename.endswith(".prof"):
+            raise ValueError("filename must be a plain file name ending with .prof")
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory / filename
+    
+    def start(self, duration=None, requests=None, command=None, filename=None):
+        # 返回会话信息；参数不合法或已有会话时抛出 ValueError
+        if self.session is not None:
+            raise ValueError("A profile is already running")
+        duration = _positive(duration, "duration")
+        requests = _positive(requests, "requests")
+        if duration is None and requests is None:
+            raise ValueError("duration or requests is required")
+        if duration is not None and duration > MAX_DURATION:
+            raise ValueError(f"duration must not exceed {MAX_DURATION} seconds")
+        if requests is not None and not isinstance(requests, int):
+            raise ValueError("requests must be a positive integer")
+        
+        session = ProfileSession(self._path(filename), duration, requests, command)
+        if command is None:
+            session.enter()
+        self.session = session
+        if duration is not None:
+            session.timer = asyncio.get_running_loop().call_later(duration, self._expire, session)
+        logger.info("Profiling started", extra={"fields": session.info()})
+        return session.info()
+    
+    def _detach(self, session):
+        # 结束采集；session 已不是当前会话时返回 False，避免过期的定时器停掉之后开始的会话
+        if session is None or session is not self.session:
+            return False
+        self.session = None
+        if session.timer is not None:
+            session.timer.cancel()
+        session.profile.disable()
+        return True
+    
+    def _expire(self, session):
+        if self._detach(session):
+            task = asyncio.create_task(self._write(session))
+            self._writes.add(task)
+            task.add_done_callback(self._writes.discard)
+    
+    async def _write(self, session):
+        # 写入失败时在返回的会话信息中带上 error
+        info = session.info()
+        try:
+            await asyncio.to_thread(session.profile.dump_stats, session.path)
+        except OSError as e:
+            info["error"] = str(e)
+            logger.error("Failed to write profile", extra={"fields": info})
+            return info
+        logger.info("Profiling finished", extra={"fields": info})
+        return info
+    
+    async def stop(self):
+        # 停止当前会话并写出文件，返回会话信息；没有会话时返回 None
+        session = self.session
+        if not self._detach(session):
+            return None
+        return await self._write(session)
+    
+    async def close(self):
+        # 服务器退出时写出未结束的会话，并等待后台写入完成
+        await self.stop()
+        if self._writes:
+            await asyncio.gather(*list(self._writes), return_exceptions=True)
+    
+    def status(self):
+        return self.session.info() if self.session is not None else None
+    
+    async def run(self, command, coro):
+        # 在当前会话下执行一条命令：限定命令时只采集匹配的命令，处理的命令数达到 requests 后结束会话
+        session = self.session
+        if session is None or (session.command is not None and command != session.command):
+            return await coro
+        if session.command is not None:
+            session.enter()
+        try:
+            return await coro
+        finally:
+            if session.command is not None:
+                session.exit()
+            session.handled += 1
+            if session.requests is not None and session.handled >= session.requests:
+                self._expire(session)
+
+profiler = Profiler()
\ No newline at end of file
@@ -0,0 +1,72 @@
+import math
+import time
+
+# 令牌桶限流：每个 (键, 命令类别) 一个桶，每秒补充 rate 个令牌，最多积累 burst 个。
+# 键为会话 id（LOGIN 为客户端地址）；类别：read 只读命令、write 修改数据的命令、login 登录。
+# 检查只是几次算术运算，超限的请求不排队直接拒绝，并告知客户端多久之后可以重试
+COMMAND_CLASSES = ("read", "write", "login")
+# 桶数超过该值时清理已补满的桶（补满的桶与新建的桶等价）
+PRUNE_THRESHOLD = 1024
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+    
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+    
+    def take(self, now, tokens=1):
+        # 返回 0 表示放行，否则返回需要等待的秒数；tokens 不能超过 burst，否则永远无法放行
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+    
+    def full(self, now):
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+class RateLimiter:
+    def __init__(self, limits=None, clock=time.monotonic):
+        # limits 为 命令类别 -> (每秒速率, 突发上限)，未配置的类别不限流
+        self.limits = dict(limits or {})
+        self.clock = clock
+        self.buckets = {}
+        self._prune_at = PRUNE_THRESHOLD
+    
+    def check(self, key, command_class, tokens=1):
+        # 返回 0 表示放行，否则返回建议的重试等待秒数；
+        # 一次消耗超过突发上限的请求永远无法放行，返回 math.inf 且不扣减令牌
+        limit = self.limits.get(command_class)
+        if limit is None:
+            return 0.0
+        if tokens > limit[1]:
+            return math.inf
+        now = self.clock()
+        bucket_key = (key, command_class)
+        bucket = self.buckets.get(bucket_key)
+        if bucket is None:
+            if len(self.buckets) >= self._prune_at:
+                self._prune(now)
+            bucket = self.buckets[bucket_key] = TokenBucket(limit[0], limit[1], now)
+        return bucket.take(now, tokens)
+    
+    def _prune(self, now):
+        self.buckets = {key: bucket for key, bucket in self.buckets.items() if not bucket.full(now)}
+        self._prune_at = max(PRUNE_THRESHOLD, 2 * len(self.buckets))
+
+def parse_limit(value):
+    # 解析 CLASS=RATE[/BURST]，例如 read=100/200；未给出 BURST 时等于 RATE（至少为 1）。返回 (类别, (速率, 突发上限))
+    command_class, _, spec = value.partition("=")
+    command_class = command_class.strip().lower()
+    if command_class not in COMMAND_CLASSES:
+        raise ValueError(f"Unknown command class: {command_class}")
+    rate, _, burst = spec.partition("/")
+    rate = float(rate)
+    burst = float(burst) if burst else max(rate, 1.0)
+    if rate <= 0 or burst < 1:
+        raise ValueError("rate must be positive and burst at least 1")
+    return command_class, (rate, burst)
\ No newline at end of file
@@ -0,0 +1,107 @@
+import asyncio
+from collections import deque
+import time
+from contextlib import asynccontextmanager
+from .metrics import metrics
+
+class RWLock:
+    # 异步读写锁：读者之间可以并发，写者独占。
+    # 等待者按先来后到排队，排在写者之后的读者不会插队，避免写者饥饿。
+    # 传入 name 时等锁耗时记入 <name>.read_wait / <name>.write_wait，不需要等待的获取记为 0
+    def __init__(self, name=None):
+        self.name = name
+        # (读等待指标名, 写等待指标名)
+        self._wait_metrics = (f"{name}.read_wait", f"{name}.write_wait") if name else None
+        self._readers = 0
+        self._writer = False
+        self._waiters = deque()
+    
+    def _wake(self):
+        while self._waiters:
+            is_writer, future = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if is_writer:
+                if self._writer or self._readers:
+                    return
+                self._waiters.popleft()
+                self._writer = True
+                future.set_result(None)
+                return
+            if self._writer:
+                return
+            self._waiters.popleft()
+            self._readers += 1
+            future.set_result(None)
+    
+    async def _wait(self, is_writer):
+        future = asyncio.get_running_loop().create_future()
+        entry = (is_writer, future)
+        self._waiters.append(entry)
+        try:
+            await future
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # 已经拿到锁但在恢复执行前被取消，需要归还
+                self._release(is_writer)
+            else:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                self._wake()
+            raise
+    
+    def _release(self, is_writer):
+        if is_writer:
+            self._writer = False
+        else:
+            self._readers -= 1
+        self._wake()
+    
+    async def _wait_timed(self, is_writer):
+        if self._wait_metrics is None:
+            await self._wait(is_writer)
+            return
+        start = time.perf_counter()
+        try:
+            await self._wait(is_writer)
+        finally:
+            metrics.observe(self._wait_metrics[is_writer], time.perf_counter() - start)
+    
+    async def acquire_read(self):
+        if not self._writer and not self._waiters:
+            self._readers += 1
+            if self._wait_metrics is not None:
+                metrics.observe(self._wait_metrics[0], 0.0)
+            return
+        await self._wait_timed(False)
+    
+    async def acquire_write(self):
+        if not self._writer and not self._readers and not self._waiters:
+            self._writer = True
+            if self._wait_metrics is not None:
+                metrics.observe(self._wait_metrics[1], 0.0)
+            return
+        await self._wait_timed(True)
+    
+    def release_read(self):
+        self._release(False)
+    
+    def release_write(self):
+        self._release(True)
+    
+    @asynccontextmanager
+    async def read(self):
+        await self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+    
+    @asynccontextmanager
+    async def write(self):
+        await self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
\ No newline at end of file